@@ -0,0 +1,245 @@
+"""Символьное вычисление схем: упорядоченные сокращенные диаграммы решений (ROBDD)
+
+Позволяет сравнивать схемы и считать выполняющие наборы без перебора
+всех 2^N строк таблицы истинности.
+"""
+
+from functools import reduce
+
+from circuit import CircuitError
+from netlist import OP_AND, OP_BUF, OP_NAND, OP_NOR, OP_NOT, OP_OR, OP_XNOR, OP_XOR
+
+# Листья диаграммы
+FALSE = 0
+TRUE = 1
+
+# Операции apply
+APPLY_AND = 0
+APPLY_OR = 1
+APPLY_XOR = 2
+
+
+class BDD:
+    """Менеджер диаграмм с общей таблицей уникальных узлов
+
+    Узел - целое число; для узла хранятся уровень переменной и потомки
+    по значениям 0 и 1. Одинаковые узлы не создаются дважды (таблица
+    уникальности), поэтому равные функции представлены одним узлом и
+    сравниваются за O(1). Результаты apply и отрицания кэшируются.
+    """
+    def __init__(self, variable_count, max_nodes=None):
+        self.variable_count = variable_count
+        self.max_nodes = max_nodes
+        # Листья стоят ниже всех переменных
+        self.level = [variable_count, variable_count]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique = {}
+        self.computed = {}
+        self.negated = {FALSE: TRUE, TRUE: FALSE}
+
+    def __len__(self):
+        return len(self.level)
+
+    def node(self, level, low, high):
+        """Узел с переменной level и потомками low (0) и high (1)"""
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique.get(key)
+        if node is None:
+            node = len(self.level)
+            if self.max_nodes is not None and node >= self.max_nodes:
+                raise CircuitError(f"Диаграмма превысила {self.max_nodes} узлов")
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique[key] = node
+        return node
+
+    def variable(self, level):
+        """Функция, равная переменной с уровнем level"""
+        return self.node(level, FALSE, TRUE)
+
+    def negate(self, f):
+        """Отрицание функции"""
+        result = self.negated.get(f)
+        if result is None:
+            result = self.node(self.level[f], self.negate(self.low[f]),
+                               self.negate(self.high[f]))
+            self.negated[f] = result
+            self.negated[result] = f
+        return result
+
+    def apply(self, op, f, g):
+        """Двухместная операция APPLY_AND, APPLY_OR или APPLY_XOR"""
+        if op == APPLY_AND:
+            if f == FALSE or g == FALSE:
+                return FALSE
+            if f == TRUE or f == g:
+                return g
+            if g == TRUE:
+                return f
+        elif op == APPLY_OR:
+            if f == TRUE or g == TRUE:
+                return TRUE
+            if f == FALSE or f == g:
+                return g
+            if g == FALSE:
+                return f
+        else:
+            if f == g:
+                return FALSE
+            if f == FALSE:
+                return g
+            if g == FALSE:
+                return f
+            if f == TRUE:
+                return self.negate(g)
+            if g == TRUE:
+                return self.negate(f)
+
+        # Все операции коммутативны - упорядочиваем аргументы для кэша
+        if f > g:
+            f, g = g, f
+        key = (op, f, g)
+        result = self.computed.get(key)
+        if result is not None:
+            return result
+
+        level_f = self.level[f]
+        level_g = self.level[g]
+        top = min(level_f, level_g)
+        f0, f1 = (self.low[f], self.high[f]) if level_f == top else (f, f)
+        g0, g1 = (self.low[g], self.high[g]) if level_g == top else (g, g)
+        result = self.node(top, self.apply(op, f0, g0), self.apply(op, f1, g1))
+        self.computed[key] = result
+        return result
+
+    def sat_count(self, f):
+        """Число наборов всех переменных, на которых функция равна 1"""
+        counts = {FALSE: 0, TRUE: 1}
+        level = self.level
+
+        def count(node):
+            """Число наборов переменных с уровня узла и ниже"""
+            result = counts.get(node)
+            if result is None:
+                low = self.low[node]
+                high = self.high[node]
+                result = (count(low) << (level[low] - level[node] - 1)) + \
+                    (count(high) << (level[high] - level[node] - 1))
+                counts[node] = result
+            return result
+
+        return count(f) << level[f]
+
+    def satisfying(self, f):
+        """Один выполняющий набор: словарь уровень -> значение или None"""
+        if f == FALSE:
+            return None
+        assignment = {}
+        while f != TRUE:
+            if self.low[f] != FALSE:
+                assignment[self.level[f]] = False
+                f = self.low[f]
+            else:
+                assignment[self.level[f]] = True
+                f = self.high[f]
+        return assignment
+
+
+def variable_order(netlist):
+    """Порядок входов: по первому достижению при обходе в глубину от выходов
+
+    Для арифметических схем такой порядок чередует разряды операндов,
+    и диаграммы остаются малыми. Недостижимые входы идут последними.
+    """
+    base = netlist.input_count
+    ops = netlist.ops
+    order = []
+    seen = set()
+    for root in netlist.outputs:
+        if root < 0 or root in seen:
+            continue
+        seen.add(root)
+        stack = [root]
+        while stack:
+            slot = stack.pop()
+            if slot < base:
+                order.append(netlist.input_names[slot])
+                continue
+            # Входы кладутся в обратном порядке, чтобы первый обошелся первым
+            for arg in reversed(ops[slot - base][1]):
+                if arg not in seen:
+                    seen.add(arg)
+                    stack.append(arg)
+    reached = set(order)
+    order += [name for name in netlist.input_names if name not in reached]
+    return order
+
+
+def build_outputs(manager, netlist, levels):
+    """Диаграммы выходов схемы; levels - уровень переменной по имени входа"""
+    nodes = [manager.variable(levels[name]) for name in netlist.input_names]
+    append = nodes.append
+    get = nodes.__getitem__
+    apply = manager.apply
+    for op, args in netlist.ops:
+        if op == OP_AND or op == OP_NAND:
+            result = reduce(lambda f, g: apply(APPLY_AND, f, g), map(get, args))
+        elif op == OP_OR or op == OP_NOR:
+            result = reduce(lambda f, g: apply(APPLY_OR, f, g), map(get, args))
+        elif op == OP_XOR or op == OP_XNOR:
+            result = reduce(lambda f, g: apply(APPLY_XOR, f, g), map(get, args))
+        elif op == OP_NOT:
+            result = manager.negate(nodes[args[0]])
+        elif op == OP_BUF:
+            result = nodes[args[0]]
+        else:
+            result = FALSE
+        if op == OP_NAND or op == OP_NOR or op == OP_XNOR:
+            result = manager.negate(result)
+        append(result)
+    return [nodes[slot] if slot >= 0 else FALSE for slot in netlist.outputs]
+
+
+def netlist_bdd(netlist, order=None, max_nodes=None):
+    """Диаграммы выходов одной схемы: (менеджер, узлы выходов, порядок входов)"""
+    if order is None:
+        order = variable_order(netlist)
+    manager = BDD(len(order), max_nodes)
+    levels = {name: level for level, name in enumerate(order)}
+    return manager, build_outputs(manager, netlist, levels), order
+
+
+def sat_counts(netlist, max_nodes=None):
+    """Число входных наборов, на которых каждый выход равен 1"""
+    manager, outputs, _ = netlist_bdd(netlist, max_nodes=max_nodes)
+    return [manager.sat_count(node) for node in outputs]
+
+
+def check_equivalence(first, second, max_nodes=None):
+    """Сравнение двух схем с одинаковыми именами входов и выходов
+
+    Возвращает None, если схемы эквивалентны, иначе (имя выхода,
+    словарь имя входа -> значение) - набор, на котором выходы различаются.
+    Входы, которых нет в одной из схем, считаются в ней неиспользуемыми.
+    """
+    if sorted(first.output_names) != sorted(second.output_names):
+        raise CircuitError("Схемы имеют разные выходы")
+    order = variable_order(first)
+    known = set(order)
+    order += [name for name in second.input_names if name not in known]
+    manager = BDD(len(order), max_nodes)
+    levels = {name: level for level, name in enumerate(order)}
+    first_outputs = dict(zip(first.output_names, build_outputs(manager, first, levels)))
+    second_outputs = dict(zip(second.output_names, build_outputs(manager, second, levels)))
+
+    for name in first.output_names:
+        difference = manager.apply(APPLY_XOR, first_outputs[name], second_outputs[name])
+        if difference != FALSE:
+            assignment = manager.satisfying(difference)
+            return name, {input_name: assignment.get(level, False)
+                          for input_name, level in levels.items()}
+    return None
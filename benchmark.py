@@ -0,0 +1,275 @@
+"""Замеры производительности моделирования на генерируемых эталонных схемах
+
+Запуск: python benchmark.py [--quick]. Схемы строятся через модель
+Circuit, поэтому замеры отражают весь путь от схемы до результатов.
+"""
+
+import argparse
+import random
+import time
+
+from circuit import Circuit
+
+# Типы вентилей случайных схем
+RANDOM_GATE_TYPES = ('AND', 'OR', 'NAND', 'NOR', 'XOR', 'XNOR', 'NOT')
+
+# Наибольшее число входов, для которых строится полная таблица истинности;
+# для более широких схем замеряются первые TABLE_ROWS строк
+MAX_TABLE_INPUTS = 20
+TABLE_ROWS = 1 << 16
+
+# Наборов для замера моделирования по одному набору и пакетного
+VECTORS = 2000
+BATCH_ROWS = 1 << 16
+
+
+class _Builder:
+    """Добавление вентилей с автоматическими именами и соединениями"""
+    def __init__(self):
+        self.circuit = Circuit()
+
+    def input(self, name):
+        return self.circuit.add_gate('INPUT', name).name
+
+    def output(self, name, source):
+        self.circuit.add_gate('OUTPUT', name)
+        self.circuit.connect(source, name)
+
+    def gate(self, gate_type, inputs):
+        name = self.circuit.add_gate(gate_type).name
+        for source in inputs:
+            self.circuit.connect(source, name)
+        return name
+
+    def full_adder(self, a, b, carry):
+        """Сумма и перенос одного разряда"""
+        total = self.gate('XOR', [a, b, carry])
+        carry = self.gate('OR', [self.gate('AND', [a, b]), self.gate('AND', [a, carry]),
+                                 self.gate('AND', [b, carry])])
+        return total, carry
+
+    def half_adder(self, a, b):
+        return self.gate('XOR', [a, b]), self.gate('AND', [a, b])
+
+
+def ripple_carry_adder(bits):
+    """Сумматор с последовательным переносом: входы a*, b*, cin, выходы s*, cout"""
+    builder = _Builder()
+    a = [builder.input(f"a{i}") for i in range(bits)]
+    b = [builder.input(f"b{i}") for i in range(bits)]
+    carry = builder.input('cin')
+    for i in range(bits):
+        total, carry = builder.full_adder(a[i], b[i], carry)
+        builder.output(f"s{i}", total)
+    builder.output('cout', carry)
+    return builder.circuit
+
+
+def carry_lookahead_adder(bits, group=4):
+    """Сумматор с ускоренным переносом внутри групп по group разрядов"""
+    builder = _Builder()
+    a = [builder.input(f"a{i}") for i in range(bits)]
+    b = [builder.input(f"b{i}") for i in range(bits)]
+    carry = builder.input('cin')
+    generate = [builder.gate('AND', [a[i], b[i]]) for i in range(bits)]
+    propagate = [builder.gate('XOR', [a[i], b[i]]) for i in range(bits)]
+    for start in range(0, bits, group):
+        # Перенос в разряд i: g[i-1] + p[i-1]g[i-2] + ... + p[i-1]...p[start]cin
+        carries = [carry]
+        for i in range(start, min(start + group, bits)):
+            terms = [generate[i]]
+            for j in range(i - 1, start - 2, -1):
+                source = generate[j] if j >= start else carry
+                terms.append(builder.gate('AND', propagate[j + 1:i + 1] + [source]))
+            carries.append(builder.gate('OR', terms))
+        for offset, i in enumerate(range(start, min(start + group, bits))):
+            builder.output(f"s{i}", builder.gate('XOR', [propagate[i], carries[offset]]))
+        carry = carries[-1]
+    builder.output('cout', carry)
+    return builder.circuit
+
+
+def array_multiplier(bits):
+    """Матричный умножитель bits x bits: входы a*, b*, выходы p* (2 * bits разрядов)"""
+    builder = _Builder()
+    a = [builder.input(f"a{i}") for i in range(bits)]
+    b = [builder.input(f"b{i}") for i in range(bits)]
+    # Строка частичных произведений j сдвинута на j разрядов
+    row = [builder.gate('AND', [a[i], b[0]]) for i in range(bits)]
+    builder.output('p0', row[0])
+    row = row[1:]
+    for j in range(1, bits):
+        partial = [builder.gate('AND', [a[i], b[j]]) for i in range(bits)]
+        result = []
+        carry = None
+        for i in range(bits):
+            if i < len(row):
+                if carry is None:
+                    total, carry = builder.half_adder(row[i], partial[i])
+                else:
+                    total, carry = builder.full_adder(row[i], partial[i], carry)
+            elif carry is None:
+                total = partial[i]
+            else:
+                total, carry = builder.half_adder(partial[i], carry)
+            result.append(total)
+        result.append(carry)
+        builder.output(f"p{j}", result[0])
+        row = result[1:]
+    for offset, source in enumerate(row):
+        builder.output(f"p{bits + offset}", source)
+    return builder.circuit
+
+
+def parity_tree(inputs, fanin=2):
+    """Дерево XOR с fanin входами у вентиля: четность inputs входов"""
+    builder = _Builder()
+    level = [builder.input(f"x{i}") for i in range(inputs)]
+    while len(level) > 1:
+        level = [builder.gate('XOR', level[i:i + fanin]) if len(level[i:i + fanin]) > 1
+                 else level[i] for i in range(0, len(level), fanin)]
+    builder.output('parity', level[0])
+    return builder.circuit
+
+
+def random_dag(inputs, gates, depth, max_fanin=3, seed=0):
+    """Случайная схема из gates вентилей на depth уровнях
+
+    Хотя бы один вход каждого вентиля берется с предыдущего уровня,
+    поэтому глубина схемы равна depth. Каждый вентиль, выход которого
+    никуда не подключен, получает OUTPUT, чтобы оптимизация не удаляла
+    часть схемы.
+    """
+    rng = random.Random(seed)
+    builder = _Builder()
+    levels = [[builder.input(f"x{i}") for i in range(inputs)]]
+    sources = list(levels[0])
+    used = set()
+    for level in range(depth):
+        count = gates // depth + (1 if level < gates % depth else 0)
+        current = []
+        for _ in range(max(count, 1)):
+            gate_type = rng.choice(RANDOM_GATE_TYPES)
+            fanin = 1 if gate_type == 'NOT' else rng.randint(2, max_fanin)
+            chosen = {rng.choice(levels[-1])}
+            while len(chosen) < min(fanin, len(sources)):
+                chosen.add(rng.choice(sources))
+            used.update(chosen)
+            current.append(builder.gate(gate_type, list(chosen)))
+        levels.append(current)
+        sources += current
+    sinks = [name for level in levels[1:] for name in level if name not in used]
+    for index, name in enumerate(sinks):
+        builder.output(f"y{index}", name)
+    return builder.circuit
+
+
+def standard_suite(quick=False):
+    """Список (название, генератор схемы) для отчета"""
+    scale = 1 if quick else 4
+    return [
+        (f"ripple-carry {16 * scale}", lambda: ripple_carry_adder(16 * scale)),
+        (f"carry-lookahead {16 * scale}", lambda: carry_lookahead_adder(16 * scale)),
+        (f"multiplier {4 * scale}x{4 * scale}", lambda: array_multiplier(4 * scale)),
+        (f"parity {16 * scale}", lambda: parity_tree(16 * scale)),
+        (f"random {2500 * scale}", lambda: random_dag(16, 2500 * scale, 25 * scale)),
+    ]
+
+
+def _best(function, repeat):
+    """Наименьшее время выполнения function за repeat запусков"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def measure(circuit, vectors=VECTORS, batch_rows=BATCH_ROWS, repeat=3, seed=0):
+    """Замеры одной схемы; словарь с временами, строками/с и вентилями/с
+
+    compile - компиляция и оптимизация схемы, single - моделирование по
+    одному набору, table - таблица истинности (полная или первые
+    TABLE_ROWS строк), batch - пакетное моделирование NumPy (None, если
+    NumPy не установлен). Вентили/с считаются по операциям вычисляемой
+    оптимизированной схемы.
+    """
+    def compile_circuit():
+        circuit.invalidate_netlist()
+        circuit.get_optimized_netlist()
+
+    result = {'gates': len(circuit.gates), 'inputs': len(circuit.input_gates)}
+    result['compile'] = _best(compile_circuit, repeat)
+    netlist = circuit.get_optimized_netlist()
+    ops = len(netlist.ops)
+    result['ops'] = ops
+
+    rng = random.Random(seed)
+    width = netlist.input_count
+    stimulus = [[rng.random() < 0.5 for _ in range(width)] for _ in range(vectors)]
+
+    def single():
+        for input_values in stimulus:
+            netlist.evaluate(input_values)
+
+    elapsed = _best(single, repeat)
+    result['single'] = (elapsed, vectors / elapsed, vectors * ops / elapsed)
+
+    # Кэш таблиц истинности не используется, чтобы замерять вычисление
+    rows = 1 << width if width <= MAX_TABLE_INPUTS else TABLE_ROWS
+    elapsed = _best(lambda: netlist.truth_table_words(0, rows), repeat)
+    result['table'] = (elapsed, rows / elapsed, rows * ops / elapsed)
+
+    try:
+        import numpy as np
+    except ImportError:
+        result['batch'] = None
+    else:
+        inputs = np.random.default_rng(seed).random((batch_rows, width)) < 0.5
+        elapsed = _best(lambda: netlist.evaluate_batch(inputs), repeat)
+        result['batch'] = (elapsed, batch_rows / elapsed, batch_rows * ops / elapsed)
+    return result
+
+
+def format_report(results):
+    """Текст отчета: строка на схему, строк/с и вентилей/с для каждого замера"""
+    lines = [f"{'схема':<24}{'вентили':>9}{'опер.':>8}{'компиляция':>12}"
+             f"{'один набор':>26}{'таблица':>26}{'пакет':>26}"]
+
+    def rate(value):
+        for limit, suffix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+            if value >= limit:
+                return f"{value / limit:.1f}{suffix}"
+        return f"{value:.0f}"
+
+    for name, result in results:
+        columns = [f"{name:<24}{result['gates']:>9}{result['ops']:>8}"
+                   f"{result['compile'] * 1000:>10.1f}мс"]
+        for key in ('single', 'table', 'batch'):
+            measured = result[key]
+            text = '-' if measured is None else \
+                f"{rate(measured[1])} стр/с {rate(measured[2])} в/с"
+            columns.append(f"{text:>26}")
+        lines.append(''.join(columns))
+    return '\n'.join(lines)
+
+
+def run_suite(quick=False, repeat=3):
+    """Замеры стандартного набора схем; список (название, результат)"""
+    return [(name, measure(generate(), repeat=repeat))
+            for name, generate in standard_suite(quick)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности моделирования")
+    parser.add_argument('--quick', action='store_true', help="малые схемы")
+    parser.add_argument('--repeat', type=int, default=3, help="запусков каждого замера")
+    args = parser.parse_args()
+    print(format_report(run_suite(args.quick, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
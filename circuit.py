@@ -0,0 +1,508 @@
+"""Модель логической схемы без зависимости от графического интерфейса"""
+
+from netlist import HIERARCHY_SEPARATOR, compile_netlist
+from sequential import compile_sequential
+from timing import DEFAULT_DELAY, TimingSimulator, slot_delays
+from truthcache import CachedNetlist
+from truthtable import iter_truth_table_parallel
+
+# Новые типы добавляются в конец: индекс типа хранится в двоичном формате
+GATE_TYPES = ['AND', 'OR', 'NOT', 'NAND', 'NOR', 'XOR', 'INPUT', 'OUTPUT',
+              'DFF', 'LATCH', 'CLOCK', 'XNOR', 'BUF', 'MODULE', 'PIN']
+
+# Элементы памяти: соединения через них не образуют комбинационных контуров
+STATE_TYPES = ('DFF', 'LATCH')
+
+
+class CircuitError(Exception):
+    """Ошибка при изменении схемы"""
+
+
+class DuplicateConnectionError(CircuitError):
+    """Попытка повторно создать существующее соединение"""
+
+
+class CombinationalLoopError(CircuitError):
+    """Соединение замыкает контур обратной связи"""
+
+
+class LogicGate:
+    """Класс для представления логического вентиля"""
+    __slots__ = ('gate_type', 'name', 'position', 'inputs', 'delay', 'module', 'pin',
+                 'rect', 'output_point', 'input_point')
+
+    def __init__(self, gate_type, name, position=(0, 0)):
+        self.gate_type = gate_type  # Один из GATE_TYPES
+        self.name = name
+        self.position = position
+        self.inputs = []  # Имена входных вентилей
+        self.delay = DEFAULT_DELAY  # Задержка распространения для TimingSimulator
+        self.module = None  # Имя определения модуля для MODULE
+        self.pin = None  # Имя выхода модуля для PIN
+        # Элементы холста, задаются интерфейсом
+        self.rect = None
+        self.output_point = None
+        self.input_point = None
+
+
+class ModuleDefinition:
+    """Определение модуля: схема-тело, выводы которой - ее INPUT и OUTPUT
+
+    Тело компилируется один раз; операции скомпилированного тела копируются
+    в схему каждого экземпляра. После определения тело не изменяется.
+    """
+    def __init__(self, name, body):
+        self.name = name
+        self.body = body
+        self.input_names = list(body.input_gates)
+        self.output_names = list(body.output_gates)
+        self._netlist = None
+
+    @property
+    def netlist(self):
+        """Оптимизированная скомпилированная схема тела"""
+        if self._netlist is None:
+            self._netlist = self.body.get_optimized_netlist()
+        return self._netlist
+
+
+class Connection:
+    """Соединение выхода одного вентиля со входом другого"""
+    __slots__ = ('source', 'target', 'line_id')
+
+    def __init__(self, source, target):
+        self.source = source  # Имя вентиля-источника
+        self.target = target  # Имя вентиля-приемника
+        self.line_id = None  # Линия на холсте, задается интерфейсом
+
+
+class Circuit:
+    """Схема: вентили, соединения и моделирование"""
+    def __init__(self):
+        self.gates = {}
+        self.connections = {}  # (откуда, куда) -> соединение
+        self.fanin = {}  # Имя вентиля -> {имя источника: соединение}
+        self.fanout = {}  # Имя вентиля -> {имя приемника: соединение}
+        self.input_gates = {}
+        self.output_gates = {}
+        self.clock_gates = {}
+        self.state_gates = {}  # Элементы памяти DFF и LATCH
+        self.instances = {}  # Экземпляры модулей (MODULE)
+        self.modules = {}  # Имя -> ModuleDefinition, общий для схемы и тел модулей
+        self.netlist = None  # Кэш скомпилированной схемы
+        self.sequential = None  # Кэш скомпилированной последовательностной схемы
+        self.optimized = None  # Кэш оптимизированной схемы
+        self.table_netlist = None  # Оптимизированная схема с кэшем таблицы истинности
+        self.reset_counter()
+
+    def reset_counter(self):
+        """Сброс счетчика для имен вентилей"""
+        self.gate_counter = {gate_type: 1 for gate_type in GATE_TYPES}
+
+    def unique_name(self, prefix):
+        """Свободное имя вида префикс + номер по счетчику префикса"""
+        number = self.gate_counter.get(prefix, 1)
+        # Пропускаем имена, уже занятые загруженными вентилями
+        while f"{prefix}{number}" in self.gates:
+            number += 1
+        self.gate_counter[prefix] = number + 1
+        return f"{prefix}{number}"
+
+    def add_gate(self, gate_type, name=None, position=(0, 0)):
+        """Добавление вентиля; без имени оно выбирается по счетчику типа"""
+        if gate_type not in GATE_TYPES:
+            raise CircuitError(f"Неизвестный тип элемента: {gate_type}")
+        if name is None:
+            name = self.unique_name(gate_type)
+        if name in self.gates:
+            raise CircuitError(f"Элемент {name} уже существует!")
+
+        gate = LogicGate(gate_type, name, position)
+        self.gates[name] = gate
+        self.fanin[name] = {}
+        self.fanout[name] = {}
+
+        if gate_type == 'INPUT':
+            self.input_gates[name] = gate
+        elif gate_type == 'OUTPUT':
+            self.output_gates[name] = gate
+        elif gate_type == 'CLOCK':
+            self.clock_gates[name] = gate
+        elif gate_type in STATE_TYPES:
+            self.state_gates[name] = gate
+        elif gate_type == 'MODULE':
+            self.instances[name] = gate
+
+        self.invalidate_netlist()
+        return gate
+
+    def define_module(self, name, body):
+        """Регистрация схемы body как модуля name
+
+        Тело может содержать экземпляры ранее определенных модулей, но не
+        элементы памяти и генераторы CLOCK.
+        """
+        if name in self.modules:
+            raise CircuitError(f"Модуль {name} уже определен")
+        if not body.input_gates or not body.output_gates:
+            raise CircuitError("Модуль должен иметь входы (INPUT) и выходы (OUTPUT)")
+        if body.state_gates or body.clock_gates:
+            raise CircuitError("Модуль не может содержать элементы памяти и CLOCK")
+        for gate in body.instances.values():
+            if gate.module not in self.modules:
+                raise CircuitError(f"Модуль {gate.module} не определен")
+        body.modules = self.modules
+        definition = ModuleDefinition(name, body)
+        self.modules[name] = definition
+        return definition
+
+    def add_instance(self, module_name, name=None, position=(0, 0)):
+        """Экземпляр модуля вместе с вентилями PIN для каждого его выхода
+
+        Входы экземпляра подключаются по порядку входов модуля, выходы
+        модуля снимаются с вентилей PIN с именами вида экземпляр.выход.
+        """
+        definition = self.modules.get(module_name)
+        if definition is None:
+            raise CircuitError(f"Модуль {module_name} не определен")
+        if name is None:
+            name = self.unique_name(module_name)
+        pin_names = [f"{name}.{output}" for output in definition.output_names]
+        for pin_name in pin_names:
+            if pin_name in self.gates:
+                raise CircuitError(f"Элемент {pin_name} уже существует!")
+
+        instance = self.add_gate('MODULE', name, position)
+        instance.module = module_name
+        x, y = position
+        for index, (pin_name, output) in enumerate(zip(pin_names, definition.output_names)):
+            pin = self.add_gate('PIN', pin_name, (x + 140, y + 60 * index))
+            pin.pin = output
+            self.connect(name, pin_name)
+        return instance
+
+    def instance_pins(self, name):
+        """Имена вентилей PIN экземпляра модуля"""
+        return [target for target in self.fanout[name]
+                if self.gates[target].gate_type == 'PIN']
+
+    def connect(self, from_name, to_name, allow_loops=True):
+        """Создание соединения между вентилями
+
+        При allow_loops=False соединение, замыкающее комбинационный контур,
+        отвергается. Проверяется только путь от приемника к источнику, без
+        обхода всей схемы; контур через элемент памяти допустим.
+        """
+        if from_name == to_name:
+            raise CircuitError("Нельзя соединять элемент с самим собой!")
+        if from_name not in self.gates:
+            raise CircuitError(f"Элемент {from_name} не найден!")
+        if to_name not in self.gates:
+            raise CircuitError(f"Элемент {to_name} не найден!")
+
+        # Проверяем, не существует ли уже такое соединение
+        if (from_name, to_name) in self.connections:
+            raise DuplicateConnectionError("Такое соединение уже существует!")
+        self.check_instance_connection(self.gates[from_name], self.gates[to_name])
+        if not allow_loops and from_name not in self.state_gates:
+            path = self.find_path(to_name, from_name)
+            if path:
+                loop = " → ".join(path + [to_name])
+                raise CombinationalLoopError(f"Соединение замыкает контур: {loop}")
+
+        connection = Connection(from_name, to_name)
+
+        self.connections[(from_name, to_name)] = connection
+        self.fanout[from_name][to_name] = connection
+        self.fanin[to_name][from_name] = connection
+        self.gates[to_name].inputs.append(from_name)
+        self.invalidate_netlist()
+        return connection
+
+    def check_instance_connection(self, source, target):
+        """Проверка соединения с экземпляром модуля или его выводом"""
+        if target.gate_type == 'PIN':
+            if source.gate_type != 'MODULE' or target.inputs:
+                raise CircuitError("Вывод модуля подключается только к своему экземпляру")
+        elif source.gate_type == 'MODULE':
+            raise CircuitError("Выходы модуля снимаются с его выводов (PIN)")
+        if target.gate_type == 'MODULE':
+            definition = self.modules.get(target.module)
+            if definition is not None and len(target.inputs) >= len(definition.input_names):
+                raise CircuitError(f"Все входы экземпляра {target.name} уже подключены")
+
+    def remove_gate(self, name):
+        """Удаление вентиля вместе с его соединениями
+
+        Возвращает список удаленных соединений.
+        """
+        removed = list(self.gate_connections(name))
+        for conn in removed:
+            del self.connections[(conn.source, conn.target)]
+            if conn.source == name:
+                # Удаляем из списка входов приемника
+                del self.fanin[conn.target][name]
+                self.gates[conn.target].inputs.remove(name)
+            else:
+                del self.fanout[conn.source][name]
+
+        del self.fanin[name]
+        del self.fanout[name]
+        self.input_gates.pop(name, None)
+        self.output_gates.pop(name, None)
+        self.clock_gates.pop(name, None)
+        self.state_gates.pop(name, None)
+        self.instances.pop(name, None)
+        del self.gates[name]
+        self.invalidate_netlist()
+        return removed
+
+    def gate_connections(self, name):
+        """Все соединения вентиля: сначала входящие, затем исходящие"""
+        yield from self.fanin[name].values()
+        yield from self.fanout[name].values()
+
+    def find_path(self, from_name, to_name):
+        """Комбинационный путь от from_name до to_name (список имен) или None
+
+        Обходятся только вентили, достижимые из from_name; путь не проходит
+        через элементы памяти.
+        """
+        parents = {from_name: None}
+        stack = [from_name]
+        while stack:
+            name = stack.pop()
+            if name == to_name:
+                path = []
+                while name is not None:
+                    path.append(name)
+                    name = parents[name]
+                return path[::-1]
+            if name in self.state_gates:
+                continue
+            for target in self.fanout[name]:
+                if target not in parents:
+                    parents[target] = name
+                    stack.append(target)
+        return None
+
+    def feedback_loops(self):
+        """Комбинационные контуры - сильно связные компоненты из нескольких вентилей
+
+        Алгоритм Тарьяна без рекурсии, время линейно по размеру схемы.
+        Соединения, выходящие из элементов памяти, не учитываются.
+        """
+        fanout = self.fanout
+        state_gates = self.state_gates
+        index = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        loops = []
+        counter = 0
+        for root in self.gates:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            # Стек обхода: вентиль и итератор по его приемникам
+            work = [(root, iter(() if root in state_gates else fanout[root]))]
+            while work:
+                name, targets = work[-1]
+                for target in targets:
+                    if target not in index:
+                        index[target] = lowlink[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack.add(target)
+                        work.append((target, iter(() if target in state_gates
+                                                  else fanout[target])))
+                        break
+                    if target in on_stack:
+                        lowlink[name] = min(lowlink[name], index[target])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[name])
+                    if lowlink[name] == index[name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == name:
+                                break
+                        if len(component) > 1:
+                            loops.append(component[::-1])
+        return loops
+
+    def clear(self):
+        """Очистка всей схемы"""
+        self.gates.clear()
+        self.connections.clear()
+        self.fanin.clear()
+        self.fanout.clear()
+        self.input_gates.clear()
+        self.output_gates.clear()
+        self.clock_gates.clear()
+        self.state_gates.clear()
+        self.instances.clear()
+        self.reset_counter()
+        self.invalidate_netlist()
+
+    def get_netlist(self):
+        """Скомпилированная схема, пересобирается только после изменений"""
+        if self.netlist is None:
+            self.netlist = compile_netlist(self.gates, self.input_gates, self.output_gates,
+                                           self.modules)
+        return self.netlist
+
+    def get_optimized_netlist(self):
+        """Оптимизированная скомпилированная схема для таблиц и пакетного моделирования
+
+        В ней меньше операций, но ячейки не соответствуют всем вентилям.
+        """
+        if self.optimized is None:
+            # Модуль optimize сам зависит от circuit
+            from optimize import optimize_netlist
+            self.optimized = optimize_netlist(self.get_netlist())
+        return self.optimized
+
+    def get_table_netlist(self):
+        """Оптимизированная схема, блоки таблицы истинности которой кэшируются
+
+        Кэш общий для схем с одинаковой структурой, поэтому повторное
+        построение таблицы неизмененной схемы не требует вычислений.
+        """
+        if self.table_netlist is None:
+            self.table_netlist = CachedNetlist(self.get_optimized_netlist())
+        return self.table_netlist
+
+    def get_sequential_netlist(self):
+        """Скомпилированная схема с элементами памяти для тактового моделирования"""
+        if self.sequential is None:
+            self.sequential = compile_sequential(self.gates, self.input_gates,
+                                                 self.clock_gates, self.state_gates,
+                                                 self.output_gates, self.modules)
+        return self.sequential
+
+    def timing_simulator(self, input_values=()):
+        """Событийное моделирование с текущими задержками вентилей
+
+        Задержки вентилей тел модулей учитываются по развернутой схеме.
+        """
+        if self.instances:
+            return self.flatten().timing_simulator(input_values)
+        netlist = self.get_netlist()
+        return TimingSimulator(netlist, slot_delays(netlist, self.gates), input_values)
+
+    def extract(self, names):
+        """Новая схема из копий вентилей names и соединений между ними"""
+        names = set(names)
+        body = Circuit()
+        body.modules = self.modules
+        for name, gate in self.gates.items():
+            if name in names:
+                copy = body.add_gate(gate.gate_type, name, gate.position)
+                copy.delay = gate.delay
+                copy.module = gate.module
+                copy.pin = gate.pin
+        for source, target in self.connections:
+            if source in names and target in names:
+                body.connect(source, target)
+        return body
+
+    def flatten(self):
+        """Развернутая схема без экземпляров модулей
+
+        Вентили тела экземпляра получают имена вида экземпляр/вентиль,
+        вентили PIN становятся повторителями BUF с прежними именами, поэтому
+        внешние соединения сохраняются. PIN заменяет провод, поэтому такой
+        повторитель получает нулевую задержку.
+        """
+        flat = Circuit()
+        for name, gate in self.gates.items():
+            if gate.gate_type == 'MODULE':
+                continue
+            if gate.gate_type == 'PIN':
+                flat.add_gate('BUF', name, gate.position).delay = 0
+                continue
+            copy = flat.add_gate(gate.gate_type, name, gate.position)
+            copy.delay = gate.delay
+        bodies = {}  # Развернутые тела модулей, по одному на определение
+        for gate in self.instances.values():
+            self._expand_instance(flat, gate, bodies)
+        for source, target in self.connections:
+            if source not in self.instances and target not in self.instances:
+                flat.connect(source, target)
+        return flat
+
+    def _expand_instance(self, flat, instance, bodies):
+        """Копирование развернутого тела экземпляра в схему flat
+
+        Экземпляр с неподключенными входами, как и при компиляции, не
+        определен: тело не копируется, и его выводы остаются без входов.
+        """
+        definition = self.modules.get(instance.module)
+        if definition is None:
+            raise CircuitError(f"Модуль {instance.module} не определен")
+        if len(instance.inputs) != len(definition.input_names):
+            return
+        body = bodies.get(instance.module)
+        if body is None:
+            body = bodies[instance.module] = definition.body.flatten()
+        prefix = instance.name + HIERARCHY_SEPARATOR
+        # Центр тела совмещается с позицией экземпляра
+        positions = [gate.position for gate in body.gates.values()]
+        center_x = sum(x for x, _ in positions) / len(positions)
+        center_y = sum(y for _, y in positions) / len(positions)
+        x, y = instance.position
+
+        # Вход тела заменяется источником соответствующего входа экземпляра
+        sources = dict(zip(body.input_gates, instance.inputs))
+        for name, gate in body.gates.items():
+            if gate.gate_type in ('INPUT', 'OUTPUT'):
+                continue
+            copy = flat.add_gate(gate.gate_type, prefix + name,
+                                 (x + gate.position[0] - center_x,
+                                  y + gate.position[1] - center_y))
+            copy.delay = gate.delay
+            sources[name] = prefix + name
+
+        for source, target in body.connections:
+            if target in body.output_gates or source not in sources:
+                continue
+            flat.connect(sources[source], sources[target])
+        for pin_name in self.instance_pins(instance.name):
+            output = body.output_gates.get(self.gates[pin_name].pin)
+            if output is not None and output.inputs and output.inputs[0] in sources:
+                flat.connect(sources[output.inputs[0]], pin_name)
+
+    def invalidate_netlist(self):
+        """Сброс скомпилированной схемы после изменения структуры"""
+        self.netlist = None
+        self.sequential = None
+        self.optimized = None
+        self.table_netlist = None
+
+    def simulate(self, input_values):
+        """Моделирование схемы для заданных входных значений"""
+        return self.get_optimized_netlist().evaluate(input_values)
+
+    def simulate_batch(self, inputs):
+        """Моделирование схемы для массива NumPy входных наборов (строки, входы)"""
+        return self.get_optimized_netlist().evaluate_batch(inputs)
+
+    def iter_truth_table(self, start=0, stop=None, workers=1):
+        """Строки таблицы истинности: кортежи '0'/'1' значений выходов
+
+        При workers больше 1 (None - все ядра) широкие таблицы считаются
+        в нескольких процессах.
+        """
+        netlist = self.get_table_netlist()
+        if workers == 1:
+            return netlist.iter_truth_table(start, stop)
+        return iter_truth_table_parallel(netlist, start, stop, workers)
@@ -0,0 +1,79 @@
+"""Потоковая выгрузка таблицы истинности в CSV и упакованный двоичный файл"""
+
+import csv
+import struct
+
+from netlist import BLOCK_ROWS, unpack_rows
+from truthtable import evaluate_ranges
+
+# Заголовок двоичного файла: сигнатура, число входов, выходов и строк в блоке
+BINARY_MAGIC = b'ASWTTT\x01\x00'
+BINARY_HEADER = struct.Struct('<III')
+NAME_LENGTH = struct.Struct('<H')
+
+
+def iter_csv_rows(netlist, workers=1):
+    """Строки таблицы истинности для CSV: значения входов, затем выходов"""
+    width = netlist.input_count
+    for start, count, words in evaluate_ranges(netlist, workers=workers):
+        for row, outputs in enumerate(unpack_rows(words, count), start):
+            yield tuple(format(row, f'0{width}b')) + outputs if width else outputs
+
+
+def export_csv(netlist, path, workers=1):
+    """Выгрузка полной таблицы истинности в CSV без хранения строк в памяти"""
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(netlist.input_names + netlist.output_names)
+        writer.writerows(iter_csv_rows(netlist, workers))
+
+
+def export_binary(netlist, path, workers=1):
+    """Выгрузка таблицы истинности в компактный двоичный файл
+
+    После заголовка и имен идут блоки по BLOCK_ROWS строк: для каждого
+    выхода столбец значений, по 8 строк в байте, младший бит - первая
+    строка. Последний блок может быть короче.
+    """
+    with open(path, 'wb') as file:
+        file.write(BINARY_MAGIC)
+        file.write(BINARY_HEADER.pack(netlist.input_count, len(netlist.output_names),
+                                      BLOCK_ROWS))
+        for name in netlist.input_names + netlist.output_names:
+            data = name.encode('utf-8')
+            file.write(NAME_LENGTH.pack(len(data)))
+            file.write(data)
+
+        for _, count, words in evaluate_ranges(netlist, workers=workers):
+            columns = [word.to_bytes((count + 7) // 8, 'little') for word in words]
+            # Диапазоны выровнены на BLOCK_ROWS, поэтому режутся на целые блоки
+            for offset in range(0, count, BLOCK_ROWS):
+                first = offset // 8
+                last = first + (min(BLOCK_ROWS, count - offset) + 7) // 8
+                for column in columns:
+                    file.write(column[first:last])
+
+
+def read_binary_header(file):
+    """Чтение заголовка двоичной таблицы: (имена входов, имена выходов, строк в блоке)"""
+    if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+        raise ValueError("Файл не является таблицей истинности")
+    input_count, output_count, block_rows = BINARY_HEADER.unpack(
+        file.read(BINARY_HEADER.size))
+    names = []
+    for _ in range(input_count + output_count):
+        length, = NAME_LENGTH.unpack(file.read(NAME_LENGTH.size))
+        names.append(file.read(length).decode('utf-8'))
+    return names[:input_count], names[input_count:], block_rows
+
+
+def iter_binary_blocks(path):
+    """Чтение двоичной таблицы по блокам: (первая строка, число строк, слова выходов)"""
+    with open(path, 'rb') as file:
+        input_names, output_names, block_rows = read_binary_header(file)
+        total = 1 << len(input_names)
+        for start in range(0, total, block_rows):
+            count = min(block_rows, total - start)
+            size = (count + 7) // 8
+            words = [int.from_bytes(file.read(size), 'little') for _ in output_names]
+            yield start, count, words
@@ -0,0 +1,304 @@
+"""Импорт схем из текстовых netlist-форматов: BLIF и подмножество структурного Verilog"""
+
+import re
+
+from circuit import Circuit, CircuitError
+
+# Имена, совпадающие со служебными тегами холста или похожие на номера
+# элементов, получают префикс
+RESERVED_NAMES = {'all', 'current', 'gate', 'grid', 'connection',
+                  'input_point', 'output_point'}
+
+
+class NetlistBuilder:
+    """Сборка схемы из описаний вентилей, заданных через имена сигналов
+
+    Каждый сигнал порождается ровно одним вентилем, который получает имя
+    этого сигнала. Вентили OUTPUT получают имена портов, поэтому сигнал,
+    совпадающий по имени с выходным портом, переименовывается.
+    """
+    def __init__(self):
+        self.inputs = []
+        self.input_set = set()  # Те же входы для быстрой проверки принадлежности
+        self.outputs = []
+        self.drivers = {}  # Сигнал -> (тип вентиля, список сигналов-входов)
+        self.inverted = {}  # Сигнал -> сигнал с его инверсией
+        self.unconnected = set()  # Выходные порты без источника
+        self.counter = 0
+
+    def add_input(self, net):
+        """Входной порт"""
+        self.inputs.append(net)
+        self.input_set.add(net)
+
+    def add_output(self, net):
+        """Выходной порт"""
+        self.outputs.append(net)
+
+    def add_unconnected_output(self, net):
+        """Выходной порт без источника, всегда равный 0"""
+        self.outputs.append(net)
+        self.unconnected.add(net)
+
+    def add_gate(self, gate_type, net, inputs):
+        """Вентиль gate_type, выход которого - сигнал net"""
+        if net in self.drivers or net in self.input_set:
+            raise CircuitError(f"Сигнал {net} имеет несколько источников")
+        unique = list(dict.fromkeys(inputs))
+        if len(unique) != len(inputs) and gate_type in ('XOR', 'XNOR'):
+            raise CircuitError(f"{gate_type} {net} с повторяющимися входами не поддерживается")
+        # Для остальных типов повтор входа не меняет результат
+        self.drivers[net] = (gate_type, unique)
+
+    def temporary(self, prefix):
+        """Имя нового внутреннего сигнала"""
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def invert(self, net):
+        """Сигнал с инверсией net; один инвертор на сигнал"""
+        if net not in self.inverted:
+            inverted = self.temporary(f"{net}_n")
+            self.add_gate('NOT', inverted, [net])
+            self.inverted[net] = inverted
+        return self.inverted[net]
+
+    def build(self):
+        """Создание схемы Circuit"""
+        output_ports = set(self.outputs)
+        names = {}
+
+        def gate_name(net):
+            """Имя вентиля для сигнала"""
+            if net not in names:
+                name = net
+                if net in output_ports and net in self.drivers:
+                    name = f"{net}_net"
+                if name in RESERVED_NAMES or name.isdigit():
+                    name = f"n{name}"
+                names[net] = name
+            return names[net]
+
+        for net in self.outputs:
+            if (net not in self.drivers and net not in self.input_set
+                    and net not in self.unconnected):
+                raise CircuitError(f"Выход {net} не имеет источника")
+        for gate_type, inputs in self.drivers.values():
+            for net in inputs:
+                if net not in self.drivers and net not in self.input_set:
+                    raise CircuitError(f"Сигнал {net} не имеет источника")
+
+        circuit = Circuit()
+        for net in self.inputs:
+            circuit.add_gate('INPUT', gate_name(net))
+        for net, (gate_type, _) in self.drivers.items():
+            circuit.add_gate(gate_type, gate_name(net))
+        output_names = []
+        for net in self.outputs:
+            name = f"{net}_out" if net in self.input_set else net
+            if name in RESERVED_NAMES or name.isdigit():
+                name = f"n{name}"
+            circuit.add_gate('OUTPUT', name)
+            output_names.append(name)
+
+        for net, (_, inputs) in self.drivers.items():
+            for source in inputs:
+                circuit.connect(gate_name(source), gate_name(net))
+        for net, name in zip(self.outputs, output_names):
+            if net not in self.unconnected:
+                circuit.connect(gate_name(net), name)
+        return circuit
+
+
+def _logical_lines(text):
+    """Строки BLIF без комментариев, с учетом переноса через обратную косую черту"""
+    pending = ''
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].rstrip()
+        if line.endswith('\\'):
+            pending += line[:-1] + ' '
+            continue
+        line = (pending + line).strip()
+        pending = ''
+        if line:
+            yield line
+    if pending.strip():
+        yield pending.strip()
+
+
+def add_cover(builder, inputs, output, cubes):
+    """Перевод покрытия .names (сумма произведений) в вентили"""
+    if not cubes:
+        raise CircuitError(f"Константа {output} не поддерживается")
+    phases = {value for _, value in cubes}
+    if len(phases) != 1:
+        raise CircuitError(f"Смешанное покрытие для {output}")
+    on_set = phases.pop() == '1'
+    if not inputs:
+        raise CircuitError(f"Константа {output} не поддерживается")
+
+    # Каждое произведение - список сигналов-литералов
+    terms = []
+    for pattern, _ in cubes:
+        if len(pattern) != len(inputs):
+            raise CircuitError(f"Неверная строка покрытия для {output}: {pattern}")
+        literals = []
+        for net, bit in zip(inputs, pattern):
+            if bit == '1':
+                literals.append(net)
+            elif bit == '0':
+                literals.append(builder.invert(net))
+            elif bit != '-':
+                raise CircuitError(f"Неверная строка покрытия для {output}: {pattern}")
+        if not literals:
+            raise CircuitError(f"Константа {output} не поддерживается")
+        terms.append(literals)
+
+    if len(terms) == 1:
+        literals = terms[0]
+        if len(literals) > 1:
+            builder.add_gate('AND' if on_set else 'NAND', output, literals)
+        elif on_set:
+            builder.add_gate('BUF', output, literals)
+        else:
+            builder.add_gate('NOT', output, literals)
+        return
+
+    term_nets = []
+    for literals in terms:
+        if len(literals) == 1:
+            term_nets.append(literals[0])
+        else:
+            term = builder.temporary(f"{output}_t")
+            builder.add_gate('AND', term, literals)
+            term_nets.append(term)
+    builder.add_gate('OR' if on_set else 'NOR', output, term_nets)
+
+
+def parse_blif(text):
+    """Разбор комбинационной BLIF-модели (.inputs/.outputs/.names)"""
+    builder = NetlistBuilder()
+    cover = None  # (входы, выход, строки покрытия) текущего .names
+
+    def finish_cover():
+        if cover is not None:
+            add_cover(builder, *cover)
+
+    for line in _logical_lines(text):
+        parts = line.split()
+        keyword = parts[0]
+        if keyword.startswith('.'):
+            finish_cover()
+            cover = None
+            if keyword == '.inputs':
+                for net in parts[1:]:
+                    builder.add_input(net)
+            elif keyword == '.outputs':
+                for net in parts[1:]:
+                    builder.add_output(net)
+            elif keyword == '.names':
+                if len(parts) < 2:
+                    raise CircuitError("Пустая директива .names")
+                cover = (parts[1:-1], parts[-1], [])
+            elif keyword == '.end':
+                break
+            elif keyword not in ('.model', '.default_input_arrival'):
+                raise CircuitError(f"Директива {keyword} не поддерживается")
+        elif cover is not None:
+            if len(parts) == 1 and not cover[0]:
+                cover[2].append(('', parts[0]))
+            elif len(parts) == 2:
+                cover[2].append((parts[0], parts[1]))
+            else:
+                raise CircuitError(f"Неверная строка покрытия: {line}")
+        else:
+            raise CircuitError(f"Неожиданная строка: {line}")
+    finish_cover()
+    return builder.build()
+
+
+# Примитивы Verilog и соответствующие им типы вентилей
+VERILOG_PRIMITIVES = {
+    'and': 'AND', 'or': 'OR', 'nand': 'NAND', 'nor': 'NOR',
+    'not': 'NOT', 'buf': 'BUF', 'xor': 'XOR', 'xnor': 'XNOR',
+}
+
+_RANGE = re.compile(r'^\[\s*(\d+)\s*:\s*(\d+)\s*\]\s*(.*)$', re.S)
+
+
+def _declared_nets(declaration):
+    """Имена сигналов из объявления input/output/wire, шины раскрываются по битам"""
+    declaration = declaration.strip()
+    match = _RANGE.match(declaration)
+    names = []
+    if match:
+        high, low = int(match.group(1)), int(match.group(2))
+        step = 1 if high >= low else -1
+        for name in match.group(3).split(','):
+            name = name.strip()
+            names.extend(f"{name}[{bit}]" for bit in range(low, high + step, step))
+    else:
+        names = [name.strip() for name in declaration.split(',')]
+    return [name for name in names if name]
+
+
+def _net(token):
+    """Нормализованное имя сигнала: без пробелов внутри индекса шины"""
+    return re.sub(r'\s+', '', token)
+
+
+def parse_verilog(text):
+    """Разбор модуля структурного Verilog из примитивов and/or/not/nand/nor/xor/xnor/buf"""
+    text = re.sub(r'/\*.*?\*/', ' ', text, flags=re.S)
+    text = re.sub(r'//[^\n]*', ' ', text)
+    # Директивы (`timescale, `define) и атрибуты (* ... *) на схему не влияют
+    text = re.sub(r'`[^\n]*', ' ', text)
+    text = re.sub(r'\(\*.*?\*\)', ' ', text, flags=re.S)
+
+    builder = NetlistBuilder()
+    for statement in text.split(';'):
+        statement = statement.strip()
+        if not statement:
+            continue
+        if statement.startswith('endmodule'):
+            break
+        match = re.match(r'^(\w+)\s*(.*)$', statement, re.S)
+        if not match:
+            raise CircuitError(f"Конструкция не поддерживается: {statement}")
+        keyword, rest = match.groups()
+        if keyword == 'module':
+            continue
+        if keyword == 'input':
+            for net in _declared_nets(rest):
+                builder.add_input(net)
+        elif keyword == 'output':
+            for net in _declared_nets(rest):
+                builder.add_output(net)
+        elif keyword == 'wire':
+            continue
+        elif keyword == 'assign':
+            target, _, expression = rest.partition('=')
+            target, expression = _net(target), _net(expression)
+            if expression.startswith('~'):
+                builder.add_gate('NOT', target, [expression[1:]])
+            else:
+                builder.add_gate('BUF', target, [expression])
+        else:
+            match = re.match(r'^(\w+)\s*(?:\w+\s*)?\((.*)\)$', statement, re.S)
+            if not match or match.group(1) not in VERILOG_PRIMITIVES:
+                raise CircuitError(f"Конструкция не поддерживается: {statement}")
+            gate_type = VERILOG_PRIMITIVES[match.group(1)]
+            nets = [_net(net) for net in match.group(2).split(',')]
+            if len(nets) < 2:
+                raise CircuitError(f"Мало выводов у примитива: {statement}")
+            builder.add_gate(gate_type, nets[0], nets[1:])
+    return builder.build()
+
+
+def import_netlist(path):
+    """Импорт схемы из файла; формат определяется по расширению (.blif или .v)"""
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    if path.lower().endswith('.blif'):
+        return parse_blif(text)
+    return parse_verilog(text)
@@ -0,0 +1,87 @@
+"""Событийное моделирование: пересчет только вентилей, зависящих от изменившегося входа"""
+
+import heapq
+
+from netlist import evaluate_op
+
+
+class IncrementalSimulator:
+    """Моделирование схемы с сохранением состояния между изменениями входов
+
+    При смене одного входа пересчитывается только его конус нагрузки,
+    причем распространение останавливается на вентилях, выход которых
+    не изменился. Операции обрабатываются в порядке номеров ячеек, то есть
+    в топологическом порядке, поэтому каждая вычисляется не более одного раза.
+    """
+    def __init__(self, netlist, input_values=()):
+        self.netlist = netlist
+
+        self.fanout = netlist.fanout
+
+        self.reset(input_values)
+
+    def reset(self, input_values=()):
+        """Полный пересчет схемы для заданных входных значений"""
+        self.values = self.netlist.evaluate_slots(tuple(input_values))
+
+    def set_input(self, index, value):
+        """Изменение входа с номером index
+
+        Возвращает список ячеек, значения которых изменились.
+        """
+        values = self.values
+        value = bool(value)
+        if values[index] == value:
+            return []
+        values[index] = value
+
+        ops = self.netlist.ops
+        base = self.netlist.input_count
+        fanout = self.fanout
+        changed = [index]
+        queue = list(fanout[index])
+        heapq.heapify(queue)
+        queued = set(queue)
+        while queue:
+            slot = heapq.heappop(queue)
+            op, args = ops[slot - base]
+            result = evaluate_op(op, args, values)
+            if result == values[slot]:
+                continue
+            values[slot] = result
+            changed.append(slot)
+            for target in fanout[slot]:
+                if target not in queued:
+                    queued.add(target)
+                    heapq.heappush(queue, target)
+        return changed
+
+    def toggle_input(self, index):
+        """Инверсия входа с номером index, возвращает изменившиеся ячейки"""
+        return self.set_input(index, not self.values[index])
+
+    def outputs(self):
+        """Текущие значения выходов схемы"""
+        values = self.values
+        return [values[slot] if slot >= 0 else False for slot in self.netlist.outputs]
+
+    def value(self, name):
+        """Текущее значение вентиля по имени или None, если оно не определено"""
+        slot = self.netlist.slots.get(name)
+        return None if slot is None else self.values[slot]
+
+
+def iter_truth_table_gray(netlist):
+    """Строки таблицы истинности в порядке кода Грея
+
+    Соседние строки отличаются одним входом, поэтому каждая следующая
+    считается инкрементально. Возвращает пары (номер строки, выходы).
+    """
+    count = netlist.input_count
+    simulator = IncrementalSimulator(netlist)
+    yield 0, simulator.outputs()
+    for step in range(1, 1 << count):
+        # В коде Грея на шаге step меняется младший единичный разряд step
+        bit = (step & -step).bit_length() - 1
+        simulator.toggle_input(count - 1 - bit)
+        yield step ^ (step >> 1), simulator.outputs()
@@ -0,0 +1,104 @@
+"""Автоматическое размещение вентилей схемы по уровням"""
+
+# Шаг сетки размещения
+COLUMN_WIDTH = 160
+ROW_HEIGHT = 80
+MARGIN = 80
+
+# Проходов упорядочивания столбцов (вперед и назад попеременно)
+ORDERING_SWEEPS = 4
+
+
+def gate_levels(circuit):
+    """Уровень каждого вентиля - длина самого длинного пути от входов
+
+    Вентили INPUT находятся на уровне 0, OUTPUT - на последнем уровне.
+    Элементы памяти, как и в Circuit.feedback_loops, разрывают контуры:
+    их входы не учитываются, и они находятся на уровне 0. Вентили в
+    комбинационных контурах ставятся после остальных.
+    """
+    state_gates = circuit.state_gates
+    pending = {name: 0 if name in state_gates else len(circuit.fanin[name])
+               for name in circuit.gates}
+    levels = {}
+    queue = [name for name, count in pending.items() if count == 0]
+    # Алгоритм Кана: вентиль получает уровень, когда известны уровни всех входов
+    while queue:
+        name = queue.pop()
+        inputs = () if name in state_gates else circuit.fanin[name]
+        levels[name] = max((levels[source] + 1 for source in inputs), default=0)
+        for target in circuit.fanout[name]:
+            if target in state_gates:
+                continue
+            pending[target] -= 1
+            if pending[target] == 0:
+                queue.append(target)
+
+    depth = max(levels.values(), default=0)
+    for name in circuit.gates:
+        if name not in levels:
+            levels[name] = depth + 1
+    for name in circuit.input_gates:
+        levels[name] = 0
+    last = max(levels.values(), default=0) + 1
+    for name in circuit.output_gates:
+        levels[name] = last
+    return levels
+
+
+def _order_columns(columns, neighbours_before, neighbours_after):
+    """Уменьшение пересечений соединений методом барицентров
+
+    Вентили столбца сортируются по среднему положению соседей в уже
+    упорядоченных столбцах; проходы идут слева направо и справа налево.
+    Положение - номер строки относительно середины столбца, поэтому
+    столбцы разной высоты сравнимы. Каждый проход линеен по числу
+    соединений, не считая сортировки столбцов.
+    """
+    position = {}
+    for column in columns:
+        middle = (len(column) - 1) / 2
+        for row, name in enumerate(column):
+            position[name] = row - middle
+
+    for sweep in range(ORDERING_SWEEPS):
+        forward = sweep % 2 == 0
+        neighbours = neighbours_before if forward else neighbours_after
+        order = range(1, len(columns)) if forward else range(len(columns) - 2, -1, -1)
+        for index in order:
+            column = columns[index]
+            keys = {}
+            for name in column:
+                linked = neighbours[name]
+                if linked:
+                    keys[name] = sum(position[other] for other in linked) / len(linked)
+                else:
+                    keys[name] = position[name]
+            # Устойчивая сортировка сохраняет порядок при равных барицентрах
+            column.sort(key=keys.__getitem__)
+            middle = (len(column) - 1) / 2
+            for row, name in enumerate(column):
+                position[name] = row - middle
+
+
+def layered_layout(circuit):
+    """Размещение вентилей столбцами по уровням, записывает LogicGate.position
+
+    Столбцы задаются топологической глубиной, порядок внутри столбца
+    подбирается так, чтобы соединения пересекались реже. Столбцы
+    выравниваются по вертикали относительно самого высокого.
+    """
+    levels = gate_levels(circuit)
+    by_level = {}
+    for name in circuit.gates:
+        by_level.setdefault(levels[name], []).append(name)
+    columns = [by_level[level] for level in sorted(by_level)]
+
+    _order_columns(columns, circuit.fanin, circuit.fanout)
+
+    tallest = max((len(column) for column in columns), default=0)
+    for index, column in enumerate(columns):
+        x = MARGIN + index * COLUMN_WIDTH
+        top = MARGIN + (tallest - len(column)) * ROW_HEIGHT / 2
+        for row, name in enumerate(column):
+            circuit.gates[name].position = (x, top + row * ROW_HEIGHT)
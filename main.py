@@ -1,46 +1,27 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import itertools
+from tkinter import ttk, messagebox, filedialog, simpledialog
 
-class LogicGate:
-    """Класс для представления логического вентиля"""
-    def __init__(self, gate_type, name, position=(0, 0)):
-        self.gate_type = gate_type  # 'AND', 'OR', 'NOT', 'NAND', 'NOR', 'XOR'
-        self.name = name
-        self.position = position
-        self.inputs = []  # Имена входных вентилей
-        self.output = None
-        self.input_values = {}  # Текущие значения входов
-        
-    def compute(self):
-        """Вычисление выхода вентиля на основе входов"""
-        if not self.inputs:
-            return None
-            
-        if self.gate_type == 'AND':
-            result = all(self.input_values.values())
-        elif self.gate_type == 'OR':
-            result = any(self.input_values.values())
-        elif self.gate_type == 'NOT':
-            # Для NOT берем первый вход
-            if self.inputs:
-                result = not self.input_values.get(self.inputs[0], False)
-            else:
-                result = None
-        elif self.gate_type == 'NAND':
-            result = not all(self.input_values.values())
-        elif self.gate_type == 'NOR':
-            result = not any(self.input_values.values())
-        elif self.gate_type == 'XOR':
-            values = list(self.input_values.values())
-            result = values[0] != values[1] if len(values) == 2 else False
-        else:
-            result = None
-            
-        self.output = result
-        return result
+from circuit import GATE_TYPES, Circuit, CircuitError, DuplicateConnectionError
+from export import export_binary, export_csv
+import importers
+from incremental import IncrementalSimulator
+from layout import layered_layout
+from netlist import unpack_rows
+from sequential import SequentialSimulator
+import storage
+from viewport import SpatialIndex, Viewport
+
+# Форматы файлов схемы
+CIRCUIT_FILETYPES = [("Схема (двоичный формат)", "*.circ"), ("Схема (JSON)", "*.json")]
+NETLIST_FILETYPES = [("Netlist", "*.blif *.v"), ("BLIF", "*.blif"), ("Verilog", "*.v")]
 
 class CircuitSimulator:
+    # Масштаб, начиная с которого рисуются подписи/точки и стрелки соединений
+    LOD_LABELS = 0.6
+    LOD_ARROWS = 0.3
+    # Не чаще одного перемещения при перетаскивании за кадр, мс
+    DRAG_FRAME_MS = 16
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Симулятор логических элементов")
@@ -65,8 +46,15 @@ class CircuitSimulator:
             'gate_nand': '#E8F5E8',
             'gate_nor': '#FFF3E0',
             'gate_xor': '#FCE4EC',
+            'gate_xnor': '#FBE9E7',
+            'gate_buf': '#EDE7F6',
             'gate_input': '#F5F5F5',
             'gate_output': '#EEEEEE',
+            'gate_dff': '#E0F2F1',
+            'gate_latch': '#F1F8E9',
+            'gate_clock': '#FFFDE7',
+            'gate_module': '#E1F5FE',
+            'gate_pin': '#F9FBE7',
             'text': '#37474F',
             'text_light': '#78909C',
             'text_dark': '#263238',
@@ -76,16 +64,27 @@ class CircuitSimulator:
             'output_dot': '#424242',
             'border': '#CFD8DC',
             'highlight': '#ECEFF1',
+            'gate_active': '#C8E6C9',
         }
         
         # Настройка стилей
         self.setup_styles()
         
-        # Хранение компонентов схемы
-        self.gates = {}
-        self.connections = []
-        self.input_gates = {}
-        self.output_gates = {}
+        # Модель схемы, не зависящая от интерфейса
+        self.circuit = Circuit()
+        self.live = None  # Инкрементальное моделирование для зондирования
+        self.live_outputs = {}  # Имя OUTPUT -> ячейка-источник для self.live
+        self.clocked = None  # Тактовое моделирование схемы с элементами памяти
+        self.checked_netlist = None  # Схема, для которой последней показана проверка
+        
+        # Видимая область и вентили/соединения, для которых есть элементы холста
+        self.viewport = Viewport()
+        self.index = SpatialIndex()
+        self.drawn_gates = set()
+        self.drawn_wires = set()
+        self.rendered_view = None  # (x, y, масштаб) последней отрисовки
+        self.render_pending = False
+        self.pan_start = None
         
         # Создание интерфейса
         self.create_widgets()
@@ -157,9 +156,15 @@ class CircuitSimulator:
         
         # Разделы панели инструментов
         sections = [
-            ("ЛОГИЧЕСКИЕ ЭЛЕМЕНТЫ", ['AND', 'OR', 'NOT', 'NAND', 'NOR', 'XOR']),
+            ("ЛОГИЧЕСКИЕ ЭЛЕМЕНТЫ", ['AND', 'OR', 'NOT', 'NAND', 'NOR', 'XOR',
+                                     'XNOR', 'BUF']),
             ("ИНТЕРФЕЙСНЫЕ ЭЛЕМЕНТЫ", ['INPUT', 'OUTPUT']),
-            ("УПРАВЛЕНИЕ", ['Соединить', 'Удалить', 'Проверить схему', 'Таблица истинности', 'Очистить схему'])
+            ("ЭЛЕМЕНТЫ ПАМЯТИ", ['DFF', 'LATCH', 'CLOCK']),
+            ("МОДУЛИ", ['Создать модуль', 'Вставить модуль', 'Развернуть модули']),
+            ("УПРАВЛЕНИЕ", ['Соединить', 'Удалить', 'Проверить схему', 'Таблица истинности',
+                            'Такт',
+                            'Разместить схему', 'Сохранить схему', 'Открыть схему',
+                            'Импорт netlist', 'Очистить схему'])
         ]
         
         for section_title, items in sections:
@@ -178,7 +183,7 @@ class CircuitSimulator:
             
             # Кнопки раздела
             for item in items:
-                if item in ['INPUT', 'OUTPUT', 'AND', 'OR', 'NOT', 'NAND', 'NOR', 'XOR']:
+                if item in GATE_TYPES:
                     # Кнопки элементов
                     btn = tk.Button(section_frame, text=item,
                                   font=('Segoe UI', 10),
@@ -205,6 +210,14 @@ class CircuitSimulator:
                         'Удалить': self.delete_selected,
                         'Проверить схему': self.check_circuit,
                         'Таблица истинности': self.show_truth_table,
+                        'Такт': self.clock_tick,
+                        'Создать модуль': self.create_module,
+                        'Вставить модуль': self.insert_module,
+                        'Развернуть модули': self.flatten_modules,
+                        'Разместить схему': self.arrange_circuit,
+                        'Сохранить схему': self.save_circuit,
+                        'Открыть схему': self.open_circuit,
+                        'Импорт netlist': self.import_netlist,
                         'Очистить схему': self.clear_circuit
                     }
                     
@@ -265,65 +278,79 @@ class CircuitSimulator:
                                highlightbackground=self.colors['border'])
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        # Сетка на холсте
-        self.draw_grid()
+        # Сетка рисуется при изменении размера холста
+        self.canvas.bind("<Configure>", lambda e: self.schedule_render())
         
         # Привязка событий мыши
         self.canvas.bind("<Button-1>", self.canvas_click)
+        self.canvas.bind("<Shift-Button-1>", self.toggle_selection)
         self.canvas.bind("<B1-Motion>", self.drag_gate)
         self.canvas.bind("<ButtonRelease-1>", self.canvas_release)
-        
-        # Выделенный элемент
+        self.canvas.bind("<Double-Button-1>", self.toggle_input)
+        
+        # Прокрутка правой или средней кнопкой, масштаб - колесом
+        for button in (2, 3):
+            self.canvas.bind(f"<Button-{button}>", self.start_pan)
+            self.canvas.bind(f"<B{button}-Motion>", self.pan)
+        self.canvas.bind("<MouseWheel>",
+                         lambda e: self.zoom(1.25 if e.delta > 0 else 0.8, e.x, e.y))
+        self.canvas.bind("<Button-4>", lambda e: self.zoom(1.25, e.x, e.y))
+        self.canvas.bind("<Button-5>", lambda e: self.zoom(0.8, e.x, e.y))
+        
+        # Выделенные элементы; selected_gate - элемент под указателем при нажатии
         self.selected_gate = None
+        self.selection = set()
+        
+        # Перетаскивание: последняя точка схемы под указателем и отложенное перемещение
+        self.drag_last = None
+        self.drag_pointer = None
+        self.drag_job = None
         self.connecting = False
         self.connection_start = None
-        
-        # Счетчик для имен
-        self.gate_counter = {'AND': 1, 'OR': 1, 'NOT': 1, 'NAND': 1,
-                            'NOR': 1, 'XOR': 1, 'INPUT': 1, 'OUTPUT': 1}
     
     def draw_grid(self):
-        """Отрисовка сетки на холсте"""
+        """Отрисовка сетки на холсте с учетом сдвига и масштаба"""
         width = self.canvas.winfo_width()
         height = self.canvas.winfo_height()
         
         if width > 1 and height > 1:
             self.canvas.delete('grid')
             
+            # При мелком масштабе сетка была бы сплошной - не рисуем ее
+            step = 20 * self.viewport.zoom
+            if step < 8:
+                return
+            offset_x = -self.viewport.x * self.viewport.zoom % step
+            offset_y = -self.viewport.y * self.viewport.zoom % step
+            
             # Рисуем вертикальные линии
-            for x in range(0, width, 20):
+            x = offset_x
+            while x < width:
                 self.canvas.create_line(x, 0, x, height, 
                                        fill=self.colors['highlight'], 
                                        tags='grid', width=0.5)
+                x += step
             
             # Рисуем горизонтальные линии
-            for y in range(0, height, 20):
+            y = offset_y
+            while y < height:
                 self.canvas.create_line(0, y, width, y, 
                                        fill=self.colors['highlight'], 
                                        tags='grid', width=0.5)
+                y += step
+            self.canvas.tag_lower('grid')
     
     def add_gate(self, gate_type):
         """Добавление нового вентиля на схему"""
-        name = f"{gate_type}{self.gate_counter[gate_type]}"
-        self.gate_counter[gate_type] += 1
-        
-        gate = LogicGate(gate_type, name, (200, 200))
-        self.gates[name] = gate
+        gate = self.circuit.add_gate(gate_type, position=(200, 200))
         
-        if gate_type == 'INPUT':
-            self.input_gates[name] = gate
-            gate.input_values = {'input': False}
-        elif gate_type == 'OUTPUT':
-            self.output_gates[name] = gate
-        
-        self.draw_gate(gate)
-        self.update_status(f"Добавлен элемент: {name}")
+        self.index.add_gate(gate.name, *gate.position)
+        self.render()
+        self.update_status(f"Добавлен элемент: {gate.name}")
         self.update_info()
     
-    def draw_gate(self, gate):
-        """Отрисовка вентиля на холсте"""
-        x, y = gate.position
-        
+    def gate_color(self, gate):
+        """Цвет заливки вентиля по его типу"""
         # Цвета для разных вентилей
         gate_colors = {
             'AND': self.colors['gate_and'],
@@ -332,41 +359,84 @@ class CircuitSimulator:
             'NAND': self.colors['gate_nand'],
             'NOR': self.colors['gate_nor'],
             'XOR': self.colors['gate_xor'],
+            'XNOR': self.colors['gate_xnor'],
+            'BUF': self.colors['gate_buf'],
             'INPUT': self.colors['gate_input'],
-            'OUTPUT': self.colors['gate_output']
+            'OUTPUT': self.colors['gate_output'],
+            'DFF': self.colors['gate_dff'],
+            'LATCH': self.colors['gate_latch'],
+            'CLOCK': self.colors['gate_clock'],
+            'MODULE': self.colors['gate_module'],
+            'PIN': self.colors['gate_pin']
         }
         
-        color = gate_colors.get(gate.gate_type, self.colors['btn_normal'])
-        
-        # Рисуем прямоугольник для вентиля с тенью
-        gate.rect = self.canvas.create_rectangle(x-45, y-25, x+45, y+25,
-                                                fill=color, 
-                                                outline=self.colors['border'],
-                                                width=1, 
+        return gate_colors.get(gate.gate_type, self.colors['btn_normal'])
+    
+    def gate_fill(self, gate):
+        """Цвет заливки вентиля: подсветка значения 1 или цвет типа"""
+        if self.live is not None:
+            slot = self.live.netlist.slots.get(gate.name)
+            if slot is None:
+                slot = self.live_outputs.get(gate.name, -1)
+            if slot >= 0 and self.live.values[slot]:
+                return self.colors['gate_active']
+        return self.gate_color(gate)
+    
+    def draw_gate(self, gate):
+        """Отрисовка вентиля на холсте
+        
+        Подписи и точки подключения рисуются только при достаточном масштабе.
+        """
+        zoom = self.viewport.zoom
+        x, y = self.viewport.to_screen(*gate.position)
+        half_width = 45 * zoom
+        half_height = 25 * zoom
+        selected = gate.name in self.selection
+        
+        # Рисуем прямоугольник для вентиля
+        gate.rect = self.canvas.create_rectangle(x - half_width, y - half_height,
+                                                x + half_width, y + half_height,
+                                                fill=self.gate_fill(gate), 
+                                                outline=self.colors['selected'] if selected
+                                                else self.colors['border'],
+                                                width=2 if selected else 1, 
                                                 tags=('gate', gate.name))
+        self.drawn_gates.add(gate.name)
+        
+        if zoom < self.LOD_LABELS:
+            return
         
         # Подписываем вентиль
         self.canvas.create_text(x, y, text=gate.name, 
-                               font=('Segoe UI', 9, 'bold'),
+                               font=('Segoe UI', max(6, round(9 * zoom)), 'bold'),
                                fill=self.colors['text_dark'],
                                tags=('gate', gate.name))
         
         # Рисуем входы и выходы только для INPUT и OUTPUT
+        port = 10 * zoom
         if gate.gate_type == 'INPUT':
             # Только выход для входного вентиля (справа)
-            gate.output_point = self.canvas.create_oval(x+35, y-5, x+45, y+5,
+            gate.output_point = self.canvas.create_oval(x + half_width - port, y - port / 2,
+                                                       x + half_width, y + port / 2,
                                                        fill=self.colors['output_dot'], 
                                                        outline=self.colors['border'],
                                                        width=1,
                                                        tags=('gate', gate.name, 'output_point'))
         elif gate.gate_type == 'OUTPUT':
             # Только вход для выходного вентиля (слева)
-            gate.input_point = self.canvas.create_oval(x-45, y-5, x-35, y+5,
+            gate.input_point = self.canvas.create_oval(x - half_width, y - port / 2,
+                                                      x - half_width + port, y + port / 2,
                                                       fill=self.colors['input_dot'], 
                                                       outline=self.colors['border'],
                                                       width=1,
                                                       tags=('gate', gate.name, 'input_point'))
     
+    def erase_gate(self, gate):
+        """Удаление элементов холста вентиля"""
+        self.canvas.delete(gate.name)
+        gate.rect = gate.output_point = gate.input_point = None
+        self.drawn_gates.discard(gate.name)
+    
     def get_connection_point(self, gate, is_output=False):
         """Получение точки соединения для вентиля"""
         x, y = gate.position
@@ -384,29 +454,25 @@ class CircuitSimulator:
         if items:
             tags = self.canvas.gettags(items[0])
             
-            # Игнорируем клик по сетке
+            # Клик по сетке снимает выделение
             if 'grid' in tags:
+                self.select_gates([])
                 return
             
             # Находим вентиль по тегу
             clicked_gate = None
             for tag in tags:
-                if tag in self.gates:
-                    clicked_gate = self.gates[tag]
+                if tag in self.circuit.gates:
+                    clicked_gate = self.circuit.gates[tag]
                     break
             
             if clicked_gate:
-                # Снимаем выделение с предыдущего
-                if self.selected_gate and self.selected_gate != clicked_gate:
-                    self.canvas.itemconfig(self.selected_gate.rect, 
-                                         outline=self.colors['border'])
+                # Клик по элементу группы сохраняет выделение для ее перемещения
+                if clicked_gate.name not in self.selection:
+                    self.select_gates([clicked_gate])
                 
                 self.selected_gate = clicked_gate
-                
-                # Выделяем новый
-                self.canvas.itemconfig(self.selected_gate.rect, 
-                                     outline=self.colors['selected'],
-                                     width=2)
+                self.drag_last = self.viewport.to_world(event.x, event.y)
                 
                 if self.connecting:
                     if self.connection_start:
@@ -421,48 +487,105 @@ class CircuitSimulator:
                         self.update_status(f"Выберите второй элемент для соединения с {self.selected_gate.name}")
                 else:
                     self.update_status(f"Выбран элемент: {self.selected_gate.name}")
+        else:
+            # Клик по пустому месту снимает выделение
+            self.select_gates([])
+    
+    def highlight_gate(self, gate, selected):
+        """Рамка выделения вентиля, если он отрисован"""
+        if gate.rect is not None:
+            self.canvas.itemconfig(gate.rect,
+                                   outline=self.colors['selected'] if selected
+                                   else self.colors['border'],
+                                   width=2 if selected else 1)
+    
+    def select_gates(self, gates):
+        """Замена выделения списком вентилей"""
+        for name in self.selection:
+            gate = self.circuit.gates.get(name)
+            if gate:
+                self.highlight_gate(gate, False)
+        self.selection = {gate.name for gate in gates}
+        for gate in gates:
+            self.highlight_gate(gate, True)
+    
+    def toggle_selection(self, event):
+        """Добавление вентиля в выделение или исключение из него (Shift+клик)"""
+        items = self.canvas.find_withtag('current')
+        if not items:
+            return
+        for tag in self.canvas.gettags(items[0]):
+            gate = self.circuit.gates.get(tag)
+            if gate:
+                if gate.name in self.selection:
+                    self.selection.discard(gate.name)
+                    self.highlight_gate(gate, False)
+                else:
+                    self.selection.add(gate.name)
+                    self.highlight_gate(gate, True)
+                self.update_status(f"Выделено элементов: {len(self.selection)}")
+                return
     
     def create_connection(self, gate_from, gate_to):
         """Создание соединения между вентилями"""
-        # Проверяем возможность соединения
-        if gate_from == gate_to:
-            messagebox.showerror("Ошибка", "Нельзя соединять элемент с самим собой!")
+        # Проверяем возможность соединения и добавляем его в модель
+        try:
+            connection = self.circuit.connect(gate_from.name, gate_to.name,
+                                              allow_loops=False)
+        except DuplicateConnectionError as error:
+            messagebox.showwarning("Предупреждение", str(error))
+            return
+        except CircuitError as error:
+            messagebox.showerror("Ошибка", str(error))
             return
         
-        # Проверяем, не существует ли уже такое соединение
-        for conn in self.connections:
-            if conn['from'] == gate_from.name and conn['to'] == gate_to.name:
-                messagebox.showwarning("Предупреждение", "Такое соединение уже существует!")
-                return
-        
-        # Добавляем соединение
-        connection = {
-            'from': gate_from.name,
-            'to': gate_to.name,
-            'from_gate': gate_from.gate_type,
-            'to_gate': gate_to.gate_type
-        }
+        self.index_connection(connection)
+        self.draw_connection(connection)
         
-        self.connections.append(connection)
-        gate_to.inputs.append(gate_from.name)
+        self.update_status(f"Создано соединение: {gate_from.name} → {gate_to.name}")
+        self.update_info()
+    
+    def connection_points(self, connection):
+        """Концы соединения в координатах схемы"""
+        from_point = self.get_connection_point(self.circuit.gates[connection.source],
+                                               is_output=True)
+        to_point = self.get_connection_point(self.circuit.gates[connection.target],
+                                             is_output=False)
+        return from_point + to_point
+    
+    def draw_connection(self, connection):
+        """Отрисовка соединения на холсте"""
+        zoom = self.viewport.zoom
+        x0, y0, x1, y1 = self.connection_points(connection)
         
-        # Получаем точки соединения
-        from_point = self.get_connection_point(gate_from, is_output=True)
-        to_point = self.get_connection_point(gate_to, is_output=False)
+        # Получаем точки соединения на экране
+        from_point = self.viewport.to_screen(x0, y0)
+        to_point = self.viewport.to_screen(x1, y1)
         
-        # Рисуем соединение
+        # Рисуем соединение, стрелку - только при достаточном масштабе
+        detailed = zoom >= self.LOD_ARROWS
         line = self.canvas.create_line(from_point[0], from_point[1],
                                      to_point[0], to_point[1],
                                      fill=self.colors['connection'], 
-                                     width=2,
-                                     arrow=tk.LAST,
+                                     width=max(1, 2 * zoom),
+                                     arrow=tk.LAST if detailed else tk.NONE,
                                      arrowshape=(8, 10, 3),
                                      tags=('connection',
-                                           f"{gate_from.name}-{gate_to.name}"))
-        connection['line_id'] = line
-        
-        self.update_status(f"Создано соединение: {gate_from.name} → {gate_to.name}")
-        self.update_info()
+                                           f"{connection.source}-{connection.target}"))
+        connection.line_id = line
+        self.drawn_wires.add((connection.source, connection.target))
+    
+    def erase_connection(self, connection):
+        """Удаление линии соединения с холста"""
+        if connection.line_id is not None:
+            self.canvas.delete(connection.line_id)
+            connection.line_id = None
+        self.drawn_wires.discard((connection.source, connection.target))
+    
+    def index_connection(self, connection):
+        """Добавление соединения в пространственный индекс"""
+        self.index.add_wire((connection.source, connection.target),
+                            *self.connection_points(connection))
     
     def start_connection(self):
         """Начало процесса соединения"""
@@ -470,125 +593,366 @@ class CircuitSimulator:
         self.update_status("Выберите первый элемент для соединения")
     
     def drag_gate(self, event):
-        """Перетаскивание вентиля"""
-        if self.selected_gate and not self.connecting:
-            dx = event.x - self.selected_gate.position[0]
-            dy = event.y - self.selected_gate.position[1]
-            
-            self.selected_gate.position = (event.x, event.y)
-            self.canvas.move(self.selected_gate.name, dx, dy)
+        """Перетаскивание выделенных вентилей
+        
+        События движения только запоминают положение указателя; перемещение
+        выполняется не чаще раза за кадр и сразу на весь накопленный сдвиг.
+        """
+        if self.selected_gate and not self.connecting and self.drag_last:
+            self.drag_pointer = (event.x, event.y)
+            if self.drag_job is None:
+                self.drag_job = self.root.after(self.DRAG_FRAME_MS, self.flush_drag)
+    
+    def flush_drag(self):
+        """Перемещение выделения к последнему положению указателя"""
+        self.drag_job = None
+        if self.drag_pointer is None:
+            return
+        x, y = self.viewport.to_world(*self.drag_pointer)
+        self.drag_pointer = None
+        dx = x - self.drag_last[0]
+        dy = y - self.drag_last[1]
+        self.drag_last = (x, y)
+        if dx or dy:
+            gates = [self.circuit.gates[name] for name in self.selection]
+            self.move_gates(gates, dx, dy)
+    
+    def move_gates(self, gates, dx, dy):
+        """Сдвиг вентилей на dx, dy в координатах схемы"""
+        zoom = self.viewport.zoom
+        connections = {}
+        hidden = False
+        for gate in gates:
+            x, y = gate.position
+            gate.position = (x + dx, y + dy)
+            self.index.move_gate(gate.name, x + dx, y + dy)
+            if gate.rect is None:
+                hidden = True
+            else:
+                self.canvas.move(gate.name, dx * zoom, dy * zoom)
+            # Соединение внутри группы обновляется один раз
+            for conn in self.circuit.gate_connections(gate.name):
+                connections[(conn.source, conn.target)] = conn
+        
+        self.update_connections(connections.values())
+        if hidden:
+            # Невидимые вентили группы могли войти в видимую область
+            self.render()
+    
+    def update_connections(self, connections):
+        """Обновление позиций соединений после перемещения вентилей"""
+        for conn in connections:
+            x0, y0, x1, y1 = self.connection_points(conn)
+            key = (conn.source, conn.target)
+            self.index.remove_wire(key)
+            self.index.add_wire(key, x0, y0, x1, y1)
             
-            # Обновляем соединения
-            self.update_connections(self.selected_gate)
-    
-    def update_connections(self, gate):
-        """Обновление позиций соединений при перемещении вентиля"""
-        for conn in self.connections:
-            if conn['from'] == gate.name or conn['to'] == gate.name:
-                from_gate = self.gates[conn['from']]
-                to_gate = self.gates[conn['to']]
-                
-                from_point = self.get_connection_point(from_gate, is_output=True)
-                to_point = self.get_connection_point(to_gate, is_output=False)
-                
-                self.canvas.coords(conn['line_id'],
-                                 from_point[0], from_point[1],
-                                 to_point[0], to_point[1])
+            if conn.line_id is None:
+                # Соединение было за пределами видимой области
+                self.draw_connection(conn)
+                continue
+            from_point = self.viewport.to_screen(x0, y0)
+            to_point = self.viewport.to_screen(x1, y1)
+            self.canvas.coords(conn.line_id,
+                             from_point[0], from_point[1],
+                             to_point[0], to_point[1])
     
     def canvas_release(self, event):
-        """Обработка отпускания кнопки мыши"""
+        """Обработка отпускания кнопки мыши: завершение перетаскивания"""
+        if self.drag_job is not None:
+            self.root.after_cancel(self.drag_job)
+            self.flush_drag()
         self.selected_gate = None
+        self.drag_last = None
+        self.drag_pointer = None
     
     def delete_selected(self):
-        """Удаление выбранного элемента"""
-        if self.selected_gate:
-            # Удаляем все соединения с этим вентилем
-            connections_to_remove = []
-            for conn in self.connections:
-                if conn['from'] == self.selected_gate.name or conn['to'] == self.selected_gate.name:
-                    connections_to_remove.append(conn)
-                    
-            for conn in connections_to_remove:
-                self.canvas.delete(conn['line_id'])
-                self.connections.remove(conn)
+        """Удаление выделенных элементов; экземпляр модуля удаляется с выводами"""
+        if self.selection:
+            for name in list(self.selection):
+                if name in self.circuit.instances:
+                    self.selection.update(self.circuit.instance_pins(name))
+            for name in self.selection:
+                gate = self.circuit.gates[name]
+                # Удаляем вентиль и все его соединения из модели
+                removed = self.circuit.remove_gate(name)
+                for conn in removed:
+                    self.erase_connection(conn)
+                    self.index.remove_wire((conn.source, conn.target))
                 
-                # Удаляем из списков входов
-                for gate in self.gates.values():
-                    if self.selected_gate.name in gate.inputs:
-                        gate.inputs.remove(self.selected_gate.name)
+                # Удаляем вентиль с холста
+                self.erase_gate(gate)
+                self.index.remove_gate(name)
             
-            # Удаляем вентиль
-            self.canvas.delete(self.selected_gate.name)
-            
-            # Удаляем из словарей
-            if self.selected_gate.name in self.input_gates:
-                del self.input_gates[self.selected_gate.name]
-            if self.selected_gate.name in self.output_gates:
-                del self.output_gates[self.selected_gate.name]
-            
-            del self.gates[self.selected_gate.name]
+            count = len(self.selection)
+            self.selection = set()
             self.selected_gate = None
-            self.update_status("Элемент удален")
+            self.update_status("Элемент удален" if count == 1
+                               else f"Удалено элементов: {count}")
             self.update_info()
     
     def clear_circuit(self):
         """Очистка всей схемы"""
         if messagebox.askyesno("Очистка схемы", "Удалить всю схему?"):
-            self.canvas.delete('all')
-            self.draw_grid()  # Перерисовываем сетку
-            self.gates.clear()
-            self.connections.clear()
-            self.input_gates.clear()
-            self.output_gates.clear()
+            self.circuit.clear()
+            self.live = None
+            self.clocked = None
             self.selected_gate = None
+            self.selection = set()
             self.connecting = False
             self.connection_start = None
-            self.gate_counter = {'AND': 1, 'OR': 1, 'NOT': 1, 'NAND': 1,
-                               'NOR': 1, 'XOR': 1, 'INPUT': 1, 'OUTPUT': 1}
+            self.redraw_circuit()
             self.update_status("Схема очищена")
             self.update_info()
     
+    def redraw_circuit(self):
+        """Перестроение пространственного индекса и перерисовка видимой части схемы"""
+        self.index.clear()
+        for gate in self.circuit.gates.values():
+            gate.rect = gate.output_point = gate.input_point = None
+            self.index.add_gate(gate.name, *gate.position)
+        for connection in self.circuit.connections.values():
+            connection.line_id = None
+            self.index_connection(connection)
+        self.rendered_view = None
+        self.render()
+    
+    def schedule_render(self):
+        """Отрисовка при ближайшем простое; частые события объединяются"""
+        if not self.render_pending:
+            self.render_pending = True
+            self.root.after_idle(self.render)
+    
+    def render(self):
+        """Отрисовка только вентилей и соединений в видимой области
+        
+        При сдвиге имеющиеся элементы холста перемещаются целиком, а
+        создаются и удаляются только вошедшие в область и вышедшие из нее.
+        При смене масштаба видимая часть рисуется заново.
+        """
+        self.render_pending = False
+        viewport = self.viewport
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        
+        # Запас на размер вентиля, чтобы не пропустить частично видимые
+        gates, wires = self.index.query(*viewport.world_rect(width, height, margin=50))
+        for name in gates:
+            for conn in self.circuit.gate_connections(name):
+                wires.add((conn.source, conn.target))
+        
+        view = (viewport.x, viewport.y, viewport.zoom)
+        if self.rendered_view is None or self.rendered_view[2] != viewport.zoom:
+            self.canvas.delete('gate', 'connection')
+            for name in self.drawn_gates:
+                gate = self.circuit.gates.get(name)
+                if gate:
+                    gate.rect = gate.output_point = gate.input_point = None
+            for key in self.drawn_wires:
+                connection = self.circuit.connections.get(key)
+                if connection:
+                    connection.line_id = None
+            self.drawn_gates.clear()
+            self.drawn_wires.clear()
+        elif self.rendered_view != view:
+            dx = (self.rendered_view[0] - viewport.x) * viewport.zoom
+            dy = (self.rendered_view[1] - viewport.y) * viewport.zoom
+            self.canvas.move('gate', dx, dy)
+            self.canvas.move('connection', dx, dy)
+        self.rendered_view = view
+        
+        for key in self.drawn_wires - wires:
+            self.erase_connection(self.circuit.connections[key])
+        for name in self.drawn_gates - gates:
+            self.erase_gate(self.circuit.gates[name])
+        for name in gates - self.drawn_gates:
+            self.draw_gate(self.circuit.gates[name])
+        for key in wires - self.drawn_wires:
+            self.draw_connection(self.circuit.connections[key])
+        
+        self.draw_grid()
+    
+    def start_pan(self, event):
+        """Начало прокрутки схемы"""
+        self.pan_start = (event.x, event.y)
+    
+    def pan(self, event):
+        """Прокрутка схемы перетаскиванием"""
+        if self.pan_start is None:
+            return
+        self.viewport.pan(event.x - self.pan_start[0], event.y - self.pan_start[1])
+        self.pan_start = (event.x, event.y)
+        self.schedule_render()
+    
+    def zoom(self, factor, x, y):
+        """Изменение масштаба вокруг точки холста (x, y)"""
+        self.viewport.zoom_at(factor, x, y)
+        self.schedule_render()
+    
+    def arrange_circuit(self):
+        """Автоматическое размещение всех вентилей по уровням"""
+        layered_layout(self.circuit)
+        self.selected_gate = None
+        self.redraw_circuit()
+        self.update_status("Схема размещена автоматически")
+    
+    def save_circuit(self):
+        """Сохранение схемы в файл"""
+        path = filedialog.asksaveasfilename(defaultextension='.circ',
+                                            filetypes=CIRCUIT_FILETYPES)
+        if not path:
+            return
+        try:
+            storage.save_circuit(self.circuit, path)
+        except (OSError, CircuitError) as error:
+            messagebox.showerror("Ошибка", f"Не удалось сохранить схему:\n{error}")
+            return
+        self.update_status(f"Схема сохранена: {path}")
+    
+    def open_circuit(self):
+        """Загрузка схемы из файла"""
+        path = filedialog.askopenfilename(filetypes=CIRCUIT_FILETYPES)
+        if not path:
+            return
+        try:
+            circuit = storage.load_circuit(path)
+        except (OSError, ValueError, KeyError, CircuitError) as error:
+            messagebox.showerror("Ошибка", f"Не удалось открыть схему:\n{error}")
+            return
+        
+        self.set_circuit(circuit)
+        self.update_status(f"Схема загружена: {path}")
+    
+    def create_module(self):
+        """Определение модуля из выделенных вентилей
+        
+        Выводы модуля - выделенные INPUT и OUTPUT, соединения с
+        невыделенными вентилями в модуль не входят.
+        """
+        if not self.selection:
+            messagebox.showinfo("Модуль", "Выделите вентили модуля, включая INPUT и OUTPUT")
+            return
+        name = simpledialog.askstring("Создать модуль", "Имя модуля:", parent=self.root)
+        if not name:
+            return
+        try:
+            body = self.circuit.extract(self.selection)
+            definition = self.circuit.define_module(name, body)
+        except CircuitError as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+        self.update_status(f"Модуль {name}: входов {len(definition.input_names)}, "
+                           f"выходов {len(definition.output_names)}")
+    
+    def insert_module(self):
+        """Добавление экземпляра определенного модуля"""
+        if not self.circuit.modules:
+            messagebox.showinfo("Модуль", "Нет определенных модулей")
+            return
+        names = ", ".join(self.circuit.modules)
+        name = simpledialog.askstring("Вставить модуль", f"Модуль ({names}):",
+                                      parent=self.root)
+        if not name:
+            return
+        try:
+            instance = self.circuit.add_instance(name, position=(200, 200))
+        except CircuitError as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+        
+        self.index.add_gate(instance.name, *instance.position)
+        for pin_name in self.circuit.instance_pins(instance.name):
+            pin = self.circuit.gates[pin_name]
+            self.index.add_gate(pin_name, *pin.position)
+            self.index_connection(self.circuit.connections[(instance.name, pin_name)])
+        self.render()
+        self.update_status(f"Добавлен экземпляр модуля {name}: {instance.name}")
+        self.update_info()
+    
+    def flatten_modules(self):
+        """Замена экземпляров модулей вентилями их тел"""
+        if not self.circuit.instances:
+            self.update_status("В схеме нет экземпляров модулей")
+            return
+        try:
+            circuit = self.circuit.flatten()
+        except CircuitError as error:
+            messagebox.showerror("Ошибка", str(error))
+            return
+        # Определения модулей остаются доступными
+        circuit.modules = self.circuit.modules
+        self.set_circuit(circuit)
+        self.update_status(f"Модули развернуты, элементов: {len(circuit.gates)}")
+    
+    def import_netlist(self):
+        """Импорт схемы из BLIF или структурного Verilog"""
+        path = filedialog.askopenfilename(filetypes=NETLIST_FILETYPES)
+        if not path:
+            return
+        try:
+            circuit = importers.import_netlist(path)
+        except (OSError, ValueError, CircuitError) as error:
+            messagebox.showerror("Ошибка", f"Не удалось импортировать netlist:\n{error}")
+            return
+        
+        # Позиции задаются всем вентилям сразу, отрисовка - один проход
+        layered_layout(circuit)
+        self.set_circuit(circuit)
+        self.update_status(f"Импортировано элементов: {len(circuit.gates)}")
+    
+    def set_circuit(self, circuit):
+        """Замена текущей схемы новой с полной перерисовкой"""
+        self.circuit = circuit
+        self.live = None
+        self.clocked = None
+        self.selected_gate = None
+        self.selection = set()
+        self.connecting = False
+        self.connection_start = None
+        self.redraw_circuit()
+        self.update_info()
+    
     def check_circuit(self):
         """Проверка схемы на корректность"""
         info = []
         
         # Проверяем INPUT вентили
-        if not self.input_gates:
+        if not self.circuit.input_gates:
             info.append("⚠️ Нет входных элементов (INPUT)")
         else:
-            info.append(f"✓ Входные элементы: {len(self.input_gates)}")
+            info.append(f"✓ Входные элементы: {len(self.circuit.input_gates)}")
             
             # Проверяем соединения INPUT
-            for input_name, input_gate in self.input_gates.items():
-                has_output = False
-                for conn in self.connections:
-                    if conn['from'] == input_name:
-                        has_output = True
-                        break
-                if not has_output:
+            for input_name, input_gate in self.circuit.input_gates.items():
+                if not self.circuit.fanout[input_name]:
                     info.append(f"  ⚠️ {input_name} не подключен")
         
         # Проверяем OUTPUT вентили
-        if not self.output_gates:
+        if not self.circuit.output_gates:
             info.append("⚠️ Нет выходных элементов (OUTPUT)")
         else:
-            info.append(f"✓ Выходные элементы: {len(self.output_gates)}")
+            info.append(f"✓ Выходные элементы: {len(self.circuit.output_gates)}")
             
             # Проверяем соединения OUTPUT
-            for output_name, output_gate in self.output_gates.items():
-                has_input = False
-                for conn in self.connections:
-                    if conn['to'] == output_name:
-                        has_input = True
-                        break
-                if not has_input:
+            for output_name, output_gate in self.circuit.output_gates.items():
+                if not self.circuit.fanin[output_name]:
                     info.append(f"  ⚠️ {output_name} не подключен")
         
         # Проверяем соединения
-        if not self.connections:
+        if not self.circuit.connections:
             info.append("⚠️ Нет соединений между элементами")
         else:
-            info.append(f"✓ Соединений: {len(self.connections)}")
+            info.append(f"✓ Соединений: {len(self.circuit.connections)}")
+        
+        # Проверяем контуры обратной связи
+        loops = self.circuit.feedback_loops()
+        if loops:
+            info.append(f"⚠️ Контуров обратной связи: {len(loops)}")
+            for loop in loops[:5]:
+                names = ", ".join(loop[:6]) + (", ..." if len(loop) > 6 else "")
+                info.append(f"  ⚠️ {names}")
+        elif self.circuit.connections:
+            info.append("✓ Контуров обратной связи нет")
         
         # Показываем информацию
         message = "\n".join(info)
@@ -601,10 +965,10 @@ class CircuitSimulator:
     
     def update_info(self):
         """Обновление информации о схеме"""
-        elements_count = len(self.gates)
-        connections_count = len(self.connections)
-        inputs_count = len(self.input_gates)
-        outputs_count = len(self.output_gates)
+        elements_count = len(self.circuit.gates)
+        connections_count = len(self.circuit.connections)
+        inputs_count = len(self.circuit.input_gates)
+        outputs_count = len(self.circuit.output_gates)
         
         info_text = f"Элементов: {elements_count}\n"
         info_text += f"Соединений: {connections_count}\n"
@@ -615,94 +979,107 @@ class CircuitSimulator:
     
     def simulate_circuit(self, input_values):
         """Моделирование схемы для заданных входных значений"""
-        # Сбрасываем все выходы
-        for gate in self.gates.values():
-            gate.output = None
-            gate.input_values = {}
-        
-        # 1. Устанавливаем значения входных вентилей
-        input_list = list(self.input_gates.items())
-        for i, (input_name, input_gate) in enumerate(input_list):
-            if i < len(input_values):
-                input_gate.output = input_values[i]
-            else:
-                input_gate.output = False
-        
-        # 2. Топологическая сортировка для правильного порядка вычислений
-        def get_sorted_gates():
-            """Получаем вентили в порядке вычислений"""
-            visited = set()
-            result = []
-            
-            def visit(gate_name):
-                if gate_name in visited:
-                    return
-                visited.add(gate_name)
-                
-                gate = self.gates[gate_name]
-                # Сначала посещаем все входы
-                for input_name in gate.inputs:
-                    if input_name in self.gates:
-                        visit(input_name)
-                
-                # Затем добавляем текущий вентиль
-                result.append(gate)
-            
-            # Начинаем с выходных вентилей
-            for output_name in self.output_gates:
-                visit(output_name)
-            
-            return result
-        
-        # 3. Вычисляем вентили в правильном порядке
-        sorted_gates = get_sorted_gates()
-        
-        for gate in sorted_gates:
-            if gate.gate_type != 'INPUT':
-                # Собираем значения входов
-                all_inputs_known = True
-                for input_name in gate.inputs:
-                    input_gate = self.gates.get(input_name)
-                    if input_gate and input_gate.output is not None:
-                        gate.input_values[input_name] = input_gate.output
-                    else:
-                        all_inputs_known = False
-                        break
-                
-                if all_inputs_known and gate.output is None:
-                    gate.compute()
+        return self.circuit.simulate(input_values)
+    
+    def simulate_batch(self, inputs):
+        """Моделирование схемы для массива NumPy входных наборов (строки, входы)"""
+        return self.circuit.simulate_batch(inputs)
+    
+    def get_live_simulator(self):
+        """Инкрементальный симулятор для текущей схемы
+        
+        После изменения схемы он создается заново с прежними значениями
+        входов, и все вентили перекрашиваются.
+        """
+        netlist = self.circuit.get_netlist()
+        if self.live is None or self.live.netlist is not netlist:
+            previous = self.live
+            input_values = []
+            for name in netlist.input_names:
+                value = previous.value(name) if previous else None
+                input_values.append(bool(value))
+            self.live = IncrementalSimulator(netlist, input_values)
+            self.live_outputs = dict(zip(netlist.output_names, netlist.outputs))
+            self.show_values(range(netlist.slot_count))
+        return self.live
+    
+    def toggle_input(self, event):
+        """Переключение значения входа двойным щелчком"""
+        items = self.canvas.find_withtag('current')
+        if not items:
+            return
         
-        # 4. Собираем выходные значения
+        for tag in self.canvas.gettags(items[0]):
+            gate = self.circuit.input_gates.get(tag)
+            if gate:
+                live = self.get_live_simulator()
+                index = live.netlist.slots[gate.name]
+                # Пересчитываются и перекрашиваются только зависящие вентили
+                self.show_values(live.toggle_input(index))
+                value = '1' if live.values[index] else '0'
+                self.update_status(f"{gate.name} = {value}")
+                break
+    
+    def show_values(self, slots):
+        """Подсветка вентилей из ячеек slots, имеющих значение 1"""
+        live = self.live
+        netlist = live.netlist
+        slots = set(slots)
+        names = [(netlist.slot_names[slot], live.values[slot]) for slot in slots]
+        # Выходы показывают значение своего источника
+        for name, source in self.live_outputs.items():
+            if source in slots:
+                names.append((name, live.values[source]))
+        
+        self.paint_values(names)
+    
+    def paint_values(self, names):
+        """Заливка вентилей по списку (имя, значение)"""
+        for name, value in names:
+            gate = self.circuit.gates.get(name)
+            # Вентили вне видимой области получат цвет при отрисовке
+            if gate and gate.rect is not None:
+                color = self.colors['gate_active'] if value else self.gate_color(gate)
+                self.canvas.itemconfig(gate.rect, fill=color)
+    
+    def clock_tick(self):
+        """Один такт схемы с элементами памяти при текущих значениях входов"""
+        netlist = self.circuit.get_sequential_netlist()
+        if self.clocked is None or self.clocked.netlist is not netlist:
+            self.clocked = SequentialSimulator(netlist)
+        live = self.get_live_simulator()
+        input_values = [live.value(name) for name in netlist.input_names]
+        self.clocked.step(input_values)
+        
+        # Показываем состояние схемы в начале следующего такта
+        logic = netlist.logic
+        values = self.clocked.slot_values(input_values)
+        names = list(zip(logic.slot_names, values))
         outputs = []
-        for output_name, output_gate in self.output_gates.items():
-            if output_gate.output is not None:
-                outputs.append(output_gate.output)
-            else:
-                # Ищем значение от последнего входного вентиля
-                last_value = False
-                for input_name in output_gate.inputs:
-                    input_gate = self.gates.get(input_name)
-                    if input_gate and input_gate.output is not None:
-                        last_value = input_gate.output
-                        break
-                outputs.append(last_value)
-        
-        return outputs
+        for name, slot in zip(netlist.output_names, netlist.output_slots):
+            value = values[slot] if slot >= 0 else False
+            names.append((name, value))
+            outputs.append(f"{name}={int(value)}")
+        self.paint_values(names)
+        self.update_status(f"Такт {self.clocked.tick}: " + " ".join(outputs))
     
     def show_truth_table(self):
         """Отображение таблицы истинности"""
-        # Сначала проверяем схему
-        self.check_circuit()
+        # Схему проверяем, только если она изменилась с прошлого раза
+        netlist = self.circuit.get_table_netlist()
+        if netlist is not self.checked_netlist:
+            self.check_circuit()
+            self.checked_netlist = netlist
         
-        if not self.input_gates:
+        if not self.circuit.input_gates:
             messagebox.showerror("Ошибка", "Добавьте входные элементы (INPUT)!")
             return
             
-        if not self.output_gates:
+        if not self.circuit.output_gates:
             messagebox.showerror("Ошибка", "Добавьте выходные элементы (OUTPUT)!")
             return
         
-        if not self.connections:
+        if not self.circuit.connections:
             messagebox.showwarning("Внимание", "Соедините элементы между собой!")
             return
         
@@ -726,8 +1103,8 @@ class CircuitSimulator:
         info_frame = tk.Frame(table_window, bg=self.colors['bg_main'])
         info_frame.pack(fill=tk.X, padx=20, pady=(0, 15))
         
-        input_count = len(self.input_gates)
-        output_count = len(self.output_gates)
+        input_count = len(self.circuit.input_gates)
+        output_count = len(self.circuit.output_gates)
         
         tk.Label(info_frame, text=f"Схема содержит {input_count} входов и {output_count} выходов", 
                 font=('Segoe UI', 11),
@@ -744,9 +1121,8 @@ class CircuitSimulator:
         table_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 20))
         
         # Создаем таблицу
-        input_names = list(self.input_gates.keys())
-        output_names = list(self.output_gates.keys())
-        all_names = input_names + output_names
+        input_names = list(self.circuit.input_gates.keys())
+        output_names = list(self.circuit.output_gates.keys())
         
         # Создаем Treeview с пользовательским стилем
         style = ttk.Style(table_window)
@@ -755,6 +1131,7 @@ class CircuitSimulator:
                        foreground=self.colors['text_dark'],
                        fieldbackground=self.colors['bg_main'],
                        borderwidth=0,
+                       rowheight=VirtualTruthTable.ROW_HEIGHT,
                        font=('Segoe UI', 10))
         
         style.configure("Custom.Treeview.Heading",
@@ -764,66 +1141,153 @@ class CircuitSimulator:
                        borderwidth=0,
                        relief='flat')
         
-        tree = ttk.Treeview(table_frame, columns=all_names, show='headings', 
-                           height=20, style="Custom.Treeview")
+        # Строки вычисляются по мере прокрутки только для видимого окна
+        VirtualTruthTable(table_frame, netlist,
+                          input_names, output_names, self.colors)
+        
+        # Кнопки выгрузки и закрытия
+        buttons_frame = tk.Frame(table_window, bg=self.colors['bg_main'])
+        buttons_frame.pack(pady=(0, 20))
+        
+        buttons = [
+            ("ЭКСПОРТ CSV", lambda: self.export_truth_table('csv', table_window)),
+            ("ЭКСПОРТ BIN", lambda: self.export_truth_table('bin', table_window)),
+            ("ЗАКРЫТЬ", table_window.destroy),
+        ]
+        for text, command in buttons:
+            btn = tk.Button(buttons_frame, text=text,
+                            font=('Segoe UI', 10, 'bold'),
+                            bg=self.colors['btn_special'],
+                            fg='white',
+                            activebackground=self.colors['btn_special_hover'],
+                            activeforeground='white',
+                            relief='flat',
+                            borderwidth=0,
+                            cursor='hand2',
+                            command=command)
+            btn.pack(side=tk.LEFT, padx=5)
+    
+    def export_truth_table(self, file_format, parent):
+        """Выгрузка полной таблицы истинности в файл"""
+        if file_format == 'csv':
+            filetypes = [("CSV", "*.csv")]
+        else:
+            filetypes = [("Двоичная таблица", "*.bin")]
+        path = filedialog.asksaveasfilename(parent=parent,
+                                            defaultextension=filetypes[0][1][1:],
+                                            filetypes=filetypes)
+        if not path:
+            return
+        
+        # Строки считаются блоками на всех ядрах и сразу пишутся в файл
+        netlist = self.circuit.get_table_netlist()
+        if file_format == 'csv':
+            export_csv(netlist, path, workers=None)
+        else:
+            export_binary(netlist, path, workers=None)
+        self.update_status(f"Таблица истинности сохранена: {path}")
+
+class VirtualTruthTable:
+    """Таблица истинности, которая вычисляет и показывает только видимые строки
+    
+    В Treeview хранится ровно столько элементов, сколько строк помещается
+    в окне. Номер строки задает значения входов, выходы для видимого окна
+    считаются одним бит-параллельным блоком при каждой прокрутке.
+    """
+    ROW_HEIGHT = 22
+    HEADING_HEIGHT = 44
+    
+    def __init__(self, parent, netlist, input_names, output_names, colors):
+        self.netlist = netlist
+        self.input_count = len(input_names)
+        self.row_count = 1 << self.input_count
+        self.first_row = 0
+        self.visible_rows = 20
+        
+        all_names = input_names + output_names
+        self.tree = ttk.Treeview(parent, columns=all_names, show='headings',
+                                 height=self.visible_rows, style="Custom.Treeview")
         
         # Настраиваем заголовки
         for name in input_names:
-            tree.heading(name, text=f"Вход\n{name}", anchor='center')
-            tree.column(name, width=80, anchor='center', minwidth=80)
+            self.tree.heading(name, text=f"Вход\n{name}", anchor='center')
+            self.tree.column(name, width=80, anchor='center', minwidth=80)
             
         for name in output_names:
-            tree.heading(name, text=f"Выход\n{name}", anchor='center')
-            tree.column(name, width=80, anchor='center', minwidth=80)
-        
-        # Генерируем все комбинации входов
-        all_combinations = list(itertools.product([False, True], repeat=input_count))
+            self.tree.heading(name, text=f"Выход\n{name}", anchor='center')
+            self.tree.column(name, width=80, anchor='center', minwidth=80)
         
-        # Заполняем таблицу
-        for combo_idx, combo in enumerate(all_combinations):
-            outputs = self.simulate_circuit(combo)
-            
-            # Форматируем значения
-            row_values = []
-            for val in combo:
-                row_values.append('1' if val else '0')
-            for val in outputs:
-                row_values.append('1' if val else '0')
-            
-            # Вставляем строку
-            tree.insert('', 'end', values=tuple(row_values))
-            
-            # Подсвечиваем каждую 2-ю строку для читаемости
-            if combo_idx % 2 == 1:
-                tree.tag_configure('oddrow', background=self.colors['highlight'])
-                tree.item(tree.get_children()[-1], tags=('oddrow',))
+        # Подсвечиваем каждую 2-ю строку для читаемости
+        self.tree.tag_configure('oddrow', background=colors['highlight'])
         
-        # Добавляем полосы прокрутки
-        vsb = ttk.Scrollbar(table_frame, orient="vertical", command=tree.yview)
-        hsb = ttk.Scrollbar(table_frame, orient="horizontal", command=tree.xview)
-        tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        # Вертикальная прокрутка управляет номером первой строки, а не Treeview
+        self.vsb = ttk.Scrollbar(parent, orient="vertical", command=self.on_scroll)
+        hsb = ttk.Scrollbar(parent, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=hsb.set)
         
         # Размещаем элементы
-        tree.grid(row=0, column=0, sticky='nsew')
-        vsb.grid(row=0, column=1, sticky='ns')
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        self.vsb.grid(row=0, column=1, sticky='ns')
         hsb.grid(row=1, column=0, sticky='ew')
         
         # Настраиваем расширение
-        table_frame.grid_rowconfigure(0, weight=1)
-        table_frame.grid_columnconfigure(0, weight=1)
+        parent.grid_rowconfigure(0, weight=1)
+        parent.grid_columnconfigure(0, weight=1)
         
-        # Кнопка закрытия
-        close_btn = tk.Button(table_window, text="ЗАКРЫТЬ",
-                            font=('Segoe UI', 10, 'bold'),
-                            bg=self.colors['btn_special'],
-                            fg='white',
-                            activebackground=self.colors['btn_special_hover'],
-                            activeforeground='white',
-                            relief='flat',
-                            borderwidth=0,
-                            cursor='hand2',
-                            command=table_window.destroy)
-        close_btn.pack(pady=(0, 20))
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', self.on_wheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_to(self.first_row - 3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_to(self.first_row + 3))
+        
+        self.refresh()
+    
+    def on_resize(self, event):
+        """Пересчет числа видимых строк при изменении размера окна"""
+        rows = max(1, (event.height - self.HEADING_HEIGHT) // self.ROW_HEIGHT)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.scroll_to(self.first_row)
+    
+    def on_wheel(self, event):
+        """Прокрутка колесом мыши"""
+        self.scroll_to(self.first_row + (-3 if event.delta > 0 else 3))
+    
+    def on_scroll(self, action, amount, unit=None):
+        """Обработка команд полосы прокрутки"""
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * self.row_count))
+        elif unit == 'pages':
+            self.scroll_to(self.first_row + int(amount) * self.visible_rows)
+        else:
+            self.scroll_to(self.first_row + int(amount))
+    
+    def scroll_to(self, row):
+        """Перемещение окна так, чтобы оно начиналось со строки row"""
+        last_start = max(0, self.row_count - self.visible_rows)
+        self.first_row = min(max(0, row), last_start)
+        self.refresh()
+    
+    def refresh(self):
+        """Вычисление и вывод строк видимого окна"""
+        count = min(self.visible_rows, self.row_count - self.first_row)
+        words = self.netlist.truth_table_block(self.first_row, count)
+        
+        # Держим в Treeview ровно count элементов
+        items = list(self.tree.get_children())
+        for _ in range(len(items), count):
+            items.append(self.tree.insert('', 'end'))
+        if len(items) > count:
+            self.tree.delete(*items[count:])
+        
+        for offset, outputs in enumerate(unpack_rows(words, count)):
+            row = self.first_row + offset
+            # Входы строки - двоичная запись ее номера
+            row_values = tuple(format(row, f'0{self.input_count}b')) + outputs
+            self.tree.item(items[offset], values=row_values,
+                           tags=('oddrow',) if row % 2 == 1 else ())
+        
+        self.vsb.set(self.first_row / self.row_count,
+                     (self.first_row + count) / self.row_count)
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,480 @@
+"""Компиляция схемы в плоский список операций для быстрого моделирования"""
+
+from array import array
+from bisect import bisect_right
+from functools import reduce
+from operator import and_, or_, xor
+
+# Коды операций скомпилированной схемы
+OP_AND = 0
+OP_OR = 1
+OP_NOT = 2
+OP_NAND = 3
+OP_NOR = 4
+OP_XOR = 5
+OP_FALSE = 6  # Вентиль с постоянным значением 0
+OP_XNOR = 7
+OP_BUF = 8
+
+# Строк таблицы истинности в одном упакованном слове
+BLOCK_ROWS = 1 << 12
+
+# Строк пакетного моделирования, обрабатываемых за один проход
+BATCH_ROWS = 1 << 20
+
+# Разделитель имени экземпляра модуля и имени вентиля его тела
+HIERARCHY_SEPARATOR = '/'
+
+GATE_OPS = {
+    'AND': OP_AND,
+    'OR': OP_OR,
+    'NOT': OP_NOT,
+    'NAND': OP_NAND,
+    'NOR': OP_NOR,
+    'XOR': OP_XOR,
+    'XNOR': OP_XNOR,
+    'BUF': OP_BUF,
+}
+
+# Вычисление операции по коду: функция (входы, чтение ячейки). XOR и
+# XNOR - четность числа единиц при любом числе входов. Значения ячеек -
+# bool, поэтому сумма равна числу единиц.
+SCALAR_OPS = (
+    lambda args, get: all(map(get, args)),  # OP_AND
+    lambda args, get: any(map(get, args)),  # OP_OR
+    lambda args, get: not get(args[0]),  # OP_NOT
+    lambda args, get: not all(map(get, args)),  # OP_NAND
+    lambda args, get: not any(map(get, args)),  # OP_NOR
+    lambda args, get: sum(map(get, args)) & 1 == 1,  # OP_XOR
+    lambda args, get: False,  # OP_FALSE
+    lambda args, get: sum(map(get, args)) & 1 == 0,  # OP_XNOR
+    lambda args, get: get(args[0]),  # OP_BUF
+)
+
+# То же для упакованных слов: функция (входы, чтение ячейки, маска разрядов)
+PACKED_OPS = (
+    lambda args, get, mask: reduce(and_, map(get, args)),  # OP_AND
+    lambda args, get, mask: reduce(or_, map(get, args)),  # OP_OR
+    lambda args, get, mask: get(args[0]) ^ mask,  # OP_NOT
+    lambda args, get, mask: reduce(and_, map(get, args)) ^ mask,  # OP_NAND
+    lambda args, get, mask: reduce(or_, map(get, args)) ^ mask,  # OP_NOR
+    lambda args, get, mask: reduce(xor, map(get, args)),  # OP_XOR
+    lambda args, get, mask: 0,  # OP_FALSE
+    lambda args, get, mask: reduce(xor, map(get, args)) ^ mask,  # OP_XNOR
+    lambda args, get, mask: get(args[0]),  # OP_BUF
+)
+
+
+class SlotNames:
+    """Имена ячеек схемы; имена ячеек тел модулей строятся при обращении
+
+    Имена хранятся частями: список собственных имен или тройка (префикс,
+    имена ячеек тела, первая ячейка тела) для операций тела модуля. Имя
+    экземпляр/вентиль не хранится, поэтому память на имена растет с числом
+    различных модулей, а не экземпляров.
+    """
+    def __init__(self, names=()):
+        self.starts = []  # Номер первой ячейки каждой части
+        self.parts = []
+        self.count = 0
+        for name in names:
+            self.append(name)
+
+    def append(self, name):
+        if not self.parts or not isinstance(self.parts[-1], list):
+            self.starts.append(self.count)
+            self.parts.append([])
+        self.parts[-1].append(name)
+        self.count += 1
+
+    def add_body(self, prefix, names, base):
+        """Имена prefix + имя для ячеек тела names, начиная с ячейки base"""
+        if len(names) > base:
+            self.starts.append(self.count)
+            self.parts.append((prefix, names, base))
+            self.count += len(names) - base
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, slot):
+        if isinstance(slot, slice):
+            return [self[index] for index in range(*slot.indices(self.count))]
+        if slot < 0:
+            slot += self.count
+        if not 0 <= slot < self.count:
+            raise IndexError(slot)
+        index = bisect_right(self.starts, slot) - 1
+        part = self.parts[index]
+        offset = slot - self.starts[index]
+        if isinstance(part, list):
+            return part[offset]
+        prefix, names, base = part
+        return prefix + names[base + offset]
+
+    def __iter__(self):
+        for part in self.parts:
+            if isinstance(part, list):
+                yield from part
+            else:
+                prefix, names, base = part
+                for index in range(base, len(names)):
+                    yield prefix + names[index]
+
+
+class CompiledNetlist:
+    """Скомпилированная схема: вентили в топологическом порядке с целочисленными входами
+
+    Ячейки 0..input_count-1 содержат значения входов, далее по одной ячейке
+    на каждую операцию. Операции хранятся в типизированных массивах: код
+    операции и входы операции k - fanin[fanin_offsets[k]:fanin_offsets[k + 1]].
+    Для каждого OUTPUT хранится номер ячейки-источника или -1, если выход
+    не подключен.
+    """
+    def __init__(self, input_names, output_names, op_types, fanin_offsets, fanin,
+                 outputs, slot_names):
+        self.input_names = input_names
+        self.output_names = output_names
+        self.input_count = len(input_names)
+        self.op_types = op_types
+        self.fanin_offsets = fanin_offsets
+        self.fanin = fanin
+        self.outputs = outputs
+        self.slot_names = slot_names  # Имя вентиля для каждой ячейки
+        self.slot_count = len(slot_names)
+        self._ops = None
+        self._slots = None
+        self._fanout = None
+
+    def __getstate__(self):
+        """При передаче в другой процесс кэши не копируются"""
+        state = self.__dict__.copy()
+        state['_ops'] = None
+        state['_slots'] = None
+        state['_fanout'] = None
+        return state
+
+    @property
+    def ops(self):
+        """Список (код операции, кортеж ячеек-входов) для циклов вычисления
+
+        Строится из массивов при первом обращении: перебор готовых кортежей
+        заметно быстрее срезов массива на каждой операции.
+        """
+        if self._ops is None:
+            offsets = self.fanin_offsets
+            fanin = self.fanin
+            self._ops = [(op, tuple(fanin[offsets[k]:offsets[k + 1]]))
+                         for k, op in enumerate(self.op_types)]
+        return self._ops
+
+    @property
+    def slots(self):
+        """Номер ячейки по имени вентиля"""
+        if self._slots is None:
+            self._slots = {name: slot for slot, name in enumerate(self.slot_names)}
+        return self._slots
+
+    @property
+    def fanout(self):
+        """Для каждой ячейки - список ячеек операций, которые ее читают"""
+        if self._fanout is None:
+            fanout = [[] for _ in range(self.slot_count)]
+            for index, (op, args) in enumerate(self.ops):
+                slot = self.input_count + index
+                for arg in set(args):
+                    fanout[arg].append(slot)
+            self._fanout = fanout
+        return self._fanout
+
+    def evaluate(self, input_values):
+        """Вычисление выходов схемы для одного набора входных значений"""
+        values = self.evaluate_slots(input_values)
+        return [values[slot] if slot >= 0 else False for slot in self.outputs]
+
+    def evaluate_slots(self, input_values):
+        """Значения всех ячеек схемы для одного набора входных значений"""
+        values = [False] * self.input_count
+        for i, value in enumerate(input_values[:self.input_count]):
+            values[i] = bool(value)
+
+        append = values.append
+        get = values.__getitem__
+        functions = SCALAR_OPS
+        for op, args in self.ops:
+            # Частые операции вычисляются на месте, остальные - через таблицу
+            if op == OP_AND:
+                append(all(map(get, args)))
+            elif op == OP_OR:
+                append(any(map(get, args)))
+            elif op == OP_NOT:
+                append(not values[args[0]])
+            elif op == OP_NAND:
+                append(not all(map(get, args)))
+            elif op == OP_NOR:
+                append(not any(map(get, args)))
+            elif op == OP_XOR and len(args) == 2:
+                append(values[args[0]] != values[args[1]])
+            else:
+                append(functions[op](args, get))
+
+        return values
+
+    def evaluate_packed(self, input_words, mask):
+        """Бит-параллельное вычисление: бит k каждого слова относится к набору k
+
+        input_words - по одному целому числу на вход, mask - единицы во всех
+        используемых разрядах. Возвращает по одному слову на выход.
+        """
+        values = list(input_words[:self.input_count])
+        values += [0] * (self.input_count - len(values))
+
+        append = values.append
+        get = values.__getitem__
+        functions = PACKED_OPS
+        for op, args in self.ops:
+            # Частые операции вычисляются на месте, остальные - через таблицу
+            if op == OP_AND:
+                append(reduce(and_, map(get, args)))
+            elif op == OP_OR:
+                append(reduce(or_, map(get, args)))
+            elif op == OP_NOT:
+                append(values[args[0]] ^ mask)
+            elif op == OP_NAND:
+                append(reduce(and_, map(get, args)) ^ mask)
+            elif op == OP_NOR:
+                append(reduce(or_, map(get, args)) ^ mask)
+            elif op == OP_XOR and len(args) == 2:
+                append(values[args[0]] ^ values[args[1]])
+            else:
+                append(functions[op](args, get, mask))
+
+        return [values[slot] if slot >= 0 else 0 for slot in self.outputs]
+
+    def evaluate_batch(self, inputs):
+        """Векторное вычисление для массива наборов (строки, входы) -> (строки, выходы)
+
+        Столбцы упаковываются по 8 строк в байт, и каждый вентиль
+        вычисляется одной побитовой операцией NumPy над всем столбцом.
+        """
+        import numpy as np
+
+        inputs = np.asarray(inputs, dtype=bool)
+        if inputs.ndim != 2:
+            raise ValueError("Ожидается двумерный массив (строки, входы)")
+
+        rows = inputs.shape[0]
+        result = np.zeros((rows, len(self.outputs)), dtype=bool)
+        operations = numpy_ops(np)
+        for start in range(0, rows, BATCH_ROWS):
+            chunk = inputs[start:start + BATCH_ROWS]
+            count = chunk.shape[0]
+            packed = np.packbits(chunk.T[:self.input_count], axis=1)
+            zeros = np.zeros((count + 7) // 8, dtype=np.uint8)
+
+            values = list(packed)
+            values += [zeros] * (self.input_count - len(values))
+            append = values.append
+            get = values.__getitem__
+            for op, args in self.ops:
+                append(operations[op](args, get, zeros))
+
+            for column, slot in enumerate(self.outputs):
+                if slot >= 0:
+                    bits = np.unpackbits(values[slot], count=count)
+                    result[start:start + count, column] = bits
+        return result
+
+    def truth_table_block(self, start, count):
+        """Слова выходов для строк таблицы истинности start..start+count-1"""
+        mask = (1 << count) - 1
+        words = [input_word(self.input_count - 1 - i, start, count)
+                 for i in range(self.input_count)]
+        return self.evaluate_packed(words, mask)
+
+    def truth_table_words(self, start, stop):
+        """Слова выходов для диапазона строк start..stop-1, собранные из блоков"""
+        words = [0] * len(self.outputs)
+        for block_start in range(start, stop, BLOCK_ROWS):
+            count = min(BLOCK_ROWS, stop - block_start)
+            shift = block_start - start
+            for i, word in enumerate(self.truth_table_block(block_start, count)):
+                words[i] |= word << shift
+        return words
+
+    def iter_truth_table(self, start=0, stop=None):
+        """Значения выходов по строкам таблицы истинности
+
+        Каждая строка - кортеж символов '0'/'1' по числу выходов. Строка с
+        номером r соответствует входам, записанным двоичным числом r
+        (первый вход - старший разряд).
+        """
+        if stop is None:
+            stop = 1 << self.input_count
+        for block_start in range(start, stop, BLOCK_ROWS):
+            count = min(BLOCK_ROWS, stop - block_start)
+            yield from unpack_rows(self.truth_table_block(block_start, count), count)
+
+
+def evaluate_op(op, args, values):
+    """Вычисление одной операции по значениям ячеек"""
+    return SCALAR_OPS[op](args, values.__getitem__)
+
+
+def numpy_ops(np):
+    """Операции над упакованными столбцами NumPy: функция (входы, чтение, нули)"""
+    return (
+        lambda args, get, zeros: reduce(np.bitwise_and, map(get, args)),  # OP_AND
+        lambda args, get, zeros: reduce(np.bitwise_or, map(get, args)),  # OP_OR
+        lambda args, get, zeros: np.invert(get(args[0])),  # OP_NOT
+        lambda args, get, zeros: np.invert(reduce(np.bitwise_and, map(get, args))),  # OP_NAND
+        lambda args, get, zeros: np.invert(reduce(np.bitwise_or, map(get, args))),  # OP_NOR
+        lambda args, get, zeros: reduce(np.bitwise_xor, map(get, args)),  # OP_XOR
+        lambda args, get, zeros: zeros,  # OP_FALSE
+        lambda args, get, zeros: np.invert(reduce(np.bitwise_xor, map(get, args))),  # OP_XNOR
+        lambda args, get, zeros: get(args[0]),  # OP_BUF
+    )
+
+
+def unpack_rows(words, count):
+    """Разбор слов выходов на count строк из символов '0'/'1'"""
+    columns = [format(word, f'0{count}b')[::-1] for word in words]
+    if columns:
+        return zip(*columns)
+    return (() for _ in range(count))
+
+
+def input_word(position, start, count):
+    """Упакованные значения входа с разрядом position для строк start..start+count-1"""
+    size = 1 << position
+    mask = (1 << count) - 1
+    if size >= count:
+        # Внутри блока значение переключается не более одного раза
+        first = (start >> position) & 1
+        boundary = size - (start & (size - 1))
+        if boundary >= count:
+            return mask if first else 0
+        low = (1 << boundary) - 1
+        return low if first else mask ^ low
+
+    # Периодический шаблон: size нулей, затем size единиц
+    period = size << 1
+    repeats = count // period + 2
+    pattern = ((1 << size) - 1) << size
+    pattern *= ((1 << (period * repeats)) - 1) // ((1 << period) - 1)
+    return (pattern >> (start & (period - 1))) & mask
+
+
+def compile_netlist(gates, input_gates, output_gates, modules=None):
+    """Компиляция схемы в CompiledNetlist
+
+    Вентили, значение которых не определено (нет входов, обратная связь,
+    неизвестный тип), в список операций не попадают, как и все вентили,
+    зависящие от них.
+
+    Экземпляр модуля (MODULE) заменяется копией операций скомпилированного
+    тела из modules[имя].netlist: тело компилируется один раз на модуль, но
+    операции копируются для каждого экземпляра, и результат - развернутая
+    схема. Имена ячеек тела не копируются, а строятся при обращении (SlotNames).
+    Вывод PIN становится повторителем выхода тела.
+    """
+    slots = {}
+    slot_names = SlotNames()
+    for name in input_gates:
+        slots[name] = len(slot_names)
+        slot_names.append(name)
+
+    op_types = array('B')
+    fanin_offsets = array('i', [0])
+    fanin = array('i')
+    undefined = set()
+    in_progress = set()
+    expanded = {}  # Экземпляр модуля -> {выход модуля: ячейка}
+
+    def splice(name, gate):
+        """Копирование операций тела модуля с перенумерацией ячеек"""
+        definition = modules.get(gate.module) if modules else None
+        if (definition is None or len(gate.inputs) != len(definition.input_names)
+                or any(input_name not in slots for input_name in gate.inputs)):
+            undefined.add(name)
+            return
+        body = definition.netlist
+        base = body.input_count
+        arguments = [slots[input_name] for input_name in gate.inputs]
+        shift = len(slot_names) - base
+        offset = len(fanin)
+        op_types.extend(body.op_types)
+        fanin.extend(arguments[arg] if arg < base else arg + shift for arg in body.fanin)
+        fanin_offsets.extend(offset + value for value in body.fanin_offsets[1:])
+        slot_names.add_body(name + HIERARCHY_SEPARATOR, body.slot_names, base)
+        expanded[name] = {output: (arguments[slot] if slot < base else slot + shift)
+                          for output, slot in zip(body.output_names, body.outputs)
+                          if slot >= 0}
+
+    def visit(root):
+        """Обход в глубину по входам без рекурсии"""
+        stack = [(root, iter(gates[root].inputs))]
+        in_progress.add(root)
+        while stack:
+            name, pending = stack[-1]
+            descended = False
+            for input_name in pending:
+                if (input_name in gates and input_name not in slots
+                        and input_name not in undefined
+                        and input_name not in expanded
+                        and input_name not in in_progress):
+                    in_progress.add(input_name)
+                    stack.append((input_name, iter(gates[input_name].inputs)))
+                    descended = True
+                    break
+            if descended:
+                continue
+
+            stack.pop()
+            in_progress.discard(name)
+            gate = gates[name]
+            if gate.gate_type == 'MODULE':
+                splice(name, gate)
+                continue
+            if gate.gate_type == 'PIN':
+                pins = expanded.get(gate.inputs[0]) if gate.inputs else None
+                source = pins.get(gate.pin) if pins else None
+                if source is None:
+                    undefined.add(name)
+                    continue
+                slots[name] = len(slot_names)
+                slot_names.append(name)
+                op_types.append(OP_BUF)
+                fanin.append(source)
+                fanin_offsets.append(len(fanin))
+                continue
+            op = GATE_OPS.get(gate.gate_type)
+            if op is None or not gate.inputs:
+                undefined.add(name)
+                continue
+            if any(input_name not in slots for input_name in gate.inputs):
+                # Вход не определен или замыкает обратную связь
+                undefined.add(name)
+                continue
+
+            slots[name] = len(slot_names)
+            slot_names.append(name)
+            op_types.append(op)
+            fanin.extend(slots[input_name] for input_name in gate.inputs)
+            fanin_offsets.append(len(fanin))
+
+    outputs = array('i')
+    for output_name, output_gate in output_gates.items():
+        source = -1
+        for input_name in output_gate.inputs:
+            if input_name not in gates:
+                continue
+            if input_name not in slots and input_name not in undefined:
+                visit(input_name)
+            if input_name in slots:
+                source = slots[input_name]
+                break
+        outputs.append(source)
+
+    return CompiledNetlist(list(input_gates), list(output_gates), op_types, fanin_offsets,
+                           fanin, outputs, slot_names)
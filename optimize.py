@@ -0,0 +1,254 @@
+"""Оптимизация скомпилированной схемы и синтез минимальной ДНФ по таблице истинности"""
+
+from array import array
+
+from circuit import CircuitError
+from importers import NetlistBuilder, add_cover
+from netlist import (OP_AND, OP_BUF, OP_FALSE, OP_NAND, OP_NOR, OP_NOT, OP_OR, OP_XNOR,
+                     OP_XOR, CompiledNetlist, input_word)
+
+# Ссылки на константы вместо номеров ячеек
+CONST_FALSE = -1
+CONST_TRUE = -2
+
+# Операция, дающая отрицание результата операции
+COMPLEMENT = {OP_AND: OP_NAND, OP_NAND: OP_AND, OP_OR: OP_NOR, OP_NOR: OP_OR,
+              OP_XOR: OP_XNOR, OP_XNOR: OP_XOR}
+
+# Наибольшее число входов для синтеза ДНФ по таблице истинности
+SOP_MAX_INPUTS = 16
+
+
+class _Rewriter:
+    """Построение новой схемы с упрощением каждой добавляемой операции"""
+    def __init__(self, netlist):
+        self.input_count = netlist.input_count
+        self.slot_names = list(netlist.slot_names[:netlist.input_count])
+        self.definitions = [None] * netlist.input_count  # (операция, входы) ячейки
+        self.table = {}  # (операция, входы) -> ячейка, для структурного хэширования
+
+    def emit(self, op, args, name):
+        """Ячейка или константа, равная операции op над ячейками args"""
+        if op == OP_FALSE:
+            return CONST_FALSE
+        if op == OP_NOT:
+            return self.negate(args[0], name)
+        if op == OP_BUF:
+            return args[0]
+        if op == OP_XOR or op == OP_XNOR:
+            return self.parity(args, op == OP_XNOR, name)
+
+        # AND/OR/NAND/NOR: поглощающая и нейтральная константы
+        conjunction = op in (OP_AND, OP_NAND)
+        inverted = op in (OP_NAND, OP_NOR)
+        absorbing = CONST_FALSE if conjunction else CONST_TRUE
+        neutral = CONST_TRUE if conjunction else CONST_FALSE
+        if absorbing in args:
+            result = absorbing
+        else:
+            args = sorted({arg for arg in args if arg != neutral})
+            if not args:
+                result = neutral
+            elif len(args) == 1:
+                result = args[0]
+            elif self.has_complementary(args):
+                # x AND NOT x = 0, x OR NOT x = 1
+                result = absorbing
+            else:
+                return self.add(op, tuple(args), name)
+        return self.negate(result, name) if inverted else result
+
+    def has_complementary(self, args):
+        """Есть ли среди входов сигнал вместе со своим отрицанием"""
+        present = set(args)
+        for arg in args:
+            definition = self.definitions[arg]
+            if definition and definition[0] == OP_NOT and definition[1][0] in present:
+                return True
+        return False
+
+    def negate(self, arg, name):
+        """Отрицание со снятием двойного отрицания"""
+        if arg == CONST_FALSE:
+            return CONST_TRUE
+        if arg == CONST_TRUE:
+            return CONST_FALSE
+        definition = self.definitions[arg]
+        if definition:
+            op, args = definition
+            if op == OP_NOT:
+                return args[0]
+            if op in COMPLEMENT:
+                return self.add(COMPLEMENT[op], args, name)
+        return self.add(OP_NOT, (arg,), name)
+
+    def parity(self, args, inverted, name):
+        """Исключающее ИЛИ ячеек и констант; inverted - XNOR"""
+        odd = set()
+        for arg in args:
+            if arg == CONST_TRUE:
+                inverted = not inverted
+            elif arg != CONST_FALSE:
+                # x XOR x = 0: остаются входы, встретившиеся нечетное число раз
+                odd ^= {arg}
+        if not odd:
+            result = CONST_FALSE
+        elif len(odd) == 1:
+            result = odd.pop()
+        else:
+            result = self.add(OP_XOR, tuple(sorted(odd)), name)
+        return self.negate(result, name) if inverted else result
+
+    def add(self, op, args, name):
+        """Новая ячейка, если такой же операции над теми же входами еще нет"""
+        key = (op, args)
+        slot = self.table.get(key)
+        if slot is None:
+            slot = len(self.slot_names)
+            self.slot_names.append(name)
+            self.definitions.append(key)
+            self.table[key] = slot
+        return slot
+
+    def materialize(self, ref, name):
+        """Ячейка для ссылки на выход; константа 1 получает свою ячейку"""
+        if ref == CONST_TRUE:
+            return self.negate(self.add(OP_FALSE, (), name), name)
+        return ref
+
+
+def optimize_netlist(netlist):
+    """Упрощенная схема с теми же входами и выходами
+
+    Выполняются распространение констант, снятие двойного отрицания
+    (и внесение NOT в AND/OR/NAND/NOR/XOR/XNOR), удаление повторяющихся входов,
+    слияние одинаковых вентилей (структурное хэширование) и удаление
+    вентилей, от которых не зависит ни один выход.
+    """
+    rewriter = _Rewriter(netlist)
+    base = netlist.input_count
+    refs = list(range(base))  # Исходная ячейка -> новая ячейка или константа
+    for index, (op, args) in enumerate(netlist.ops):
+        name = netlist.slot_names[base + index]
+        refs.append(rewriter.emit(op, [refs[arg] for arg in args], name))
+
+    output_refs = []
+    for slot, name in zip(netlist.outputs, netlist.output_names):
+        ref = refs[slot] if slot >= 0 else CONST_FALSE
+        output_refs.append(rewriter.materialize(ref, name))
+
+    # Удаление недостижимых от выходов ячеек с перенумерацией
+    definitions = rewriter.definitions
+    live = [False] * len(definitions)
+    stack = [ref for ref in output_refs if ref >= 0]
+    while stack:
+        slot = stack.pop()
+        if live[slot]:
+            continue
+        live[slot] = True
+        if definitions[slot]:
+            stack.extend(definitions[slot][1])
+
+    renumber = list(range(base))
+    slot_names = list(rewriter.slot_names[:base])
+    op_types = array('B')
+    fanin_offsets = array('i', [0])
+    fanin = array('i')
+    for slot in range(base, len(definitions)):
+        if not live[slot]:
+            renumber.append(-1)
+            continue
+        op, args = definitions[slot]
+        renumber.append(len(slot_names))
+        slot_names.append(rewriter.slot_names[slot])
+        op_types.append(op)
+        fanin.extend(renumber[arg] for arg in args)
+        fanin_offsets.append(len(fanin))
+
+    outputs = array('i', (renumber[ref] if ref >= 0 else -1 for ref in output_refs))
+    return CompiledNetlist(list(netlist.input_names), list(netlist.output_names), op_types,
+                           fanin_offsets, fanin, outputs, slot_names)
+
+
+def minimize_sop(on_word, input_count, dc_word=0):
+    """Минимальное покрытие функции произведениями (эвристика в духе Espresso)
+
+    on_word и dc_word - упакованные столбцы таблицы истинности (бит r -
+    строка r, первый вход - старший разряд номера строки): где функция
+    равна 1 и где ее значение безразлично. Непокрытая строка расширяется
+    до простой импликанты удалением литералов, пока произведение не
+    задевает нулей функции, затем лишние произведения отбрасываются.
+    Проверки - побитовые операции над столбцами сразу для всех строк.
+    Возвращает список произведений {номер входа: значение}.
+    """
+    rows = 1 << input_count
+    full = (1 << rows) - 1
+    off_word = full & ~(on_word | dc_word)
+    columns = [input_word(input_count - 1 - i, 0, rows) for i in range(input_count)]
+
+    def cube_word(cube):
+        word = full
+        for index, value in cube.items():
+            word &= columns[index] if value else full ^ columns[index]
+        return word
+
+    cubes = []
+    uncovered = on_word
+    while uncovered:
+        row = (uncovered & -uncovered).bit_length() - 1
+        cube = {index: bool(row >> (input_count - 1 - index) & 1)
+                for index in range(input_count)}
+        # Расширение: литерал удаляется, если произведение не задевает нулей
+        for index in range(input_count):
+            value = cube.pop(index)
+            if cube_word(cube) & off_word:
+                cube[index] = value
+        cubes.append(cube)
+        uncovered &= ~cube_word(cube)
+
+    # Удаление произведений, покрытых остальными
+    words = [cube_word(cube) for cube in cubes]
+    index = len(cubes) - 1
+    while index >= 0:
+        others = 0
+        for other, word in enumerate(words):
+            if other != index:
+                others |= word
+        if on_word & ~others == 0:
+            del cubes[index]
+            del words[index]
+        index -= 1
+    return cubes
+
+
+def sop_circuit(netlist):
+    """Схема из вентилей AND/OR/NOT, реализующая минимальные ДНФ выходов netlist"""
+    input_count = netlist.input_count
+    if input_count > SOP_MAX_INPUTS:
+        raise CircuitError(f"Синтез ДНФ поддерживает не больше {SOP_MAX_INPUTS} входов")
+
+    words = netlist.truth_table_words(0, 1 << input_count)
+    builder = NetlistBuilder()
+    for name in netlist.input_names:
+        builder.add_input(name)
+    for name, word in zip(netlist.output_names, words):
+        cubes = minimize_sop(word, input_count)
+        if not cubes:
+            # Неподключенный выход равен 0
+            builder.add_unconnected_output(name)
+            continue
+        builder.add_output(name)
+        if cubes == [{}]:
+            # Константа 1 - x OR NOT x
+            if not input_count:
+                raise CircuitError(f"Выход {name} - константа 1 без входов")
+            first = netlist.input_names[0]
+            builder.add_gate('OR', name, [first, builder.invert(first)])
+            continue
+        patterns = []
+        for cube in cubes:
+            pattern = ''.join('-' if index not in cube else '1' if cube[index] else '0'
+                              for index in range(input_count))
+            patterns.append((pattern, '1'))
+        add_cover(builder, list(netlist.input_names), name, patterns)
+    return builder.build()
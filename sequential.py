@@ -0,0 +1,230 @@
+"""Тактовое моделирование схем с элементами памяти: DFF, LATCH и CLOCK
+
+Один такт ядра - половина периода CLOCK: значение всех генераторов CLOCK
+в такте t равно t & 1. В каждом такте комбинационная часть вычисляется
+один раз по значениям входов, генераторов и элементов памяти, после чего
+элементы памяти обновляются и новые значения видны со следующего такта.
+
+Входы элементов памяти задаются порядком соединений:
+    DFF [D]       - запоминает D в каждом такте
+    DFF [D, CLK]  - запоминает D по фронту CLK (0 в прошлом такте, 1 в текущем)
+    LATCH [D, EN] - запоминает D в такте, где EN = 1; прозрачность защелки
+                    внутри такта не моделируется
+Начальное состояние всех элементов памяти - 0.
+"""
+
+from array import array
+
+from netlist import (OP_AND, OP_BUF, OP_NAND, OP_NOR, OP_NOT, OP_OR, OP_XNOR, OP_XOR,
+                     compile_netlist)
+
+# Виды элементов памяти
+KIND_DFF = 0  # Без входа CLK
+KIND_DFF_CLOCKED = 1
+KIND_LATCH = 2
+
+
+class _Pin:
+    """Вход элемента памяти, подключаемый к комбинационной части как выход"""
+    __slots__ = ('inputs',)
+
+    def __init__(self, source):
+        self.inputs = [] if source is None else [source]
+
+
+class SequentialNetlist:
+    """Скомпилированная последовательностная схема
+
+    logic - комбинационная часть (CompiledNetlist), ее источники по порядку:
+    входы, генераторы CLOCK, элементы памяти. Ее выходы: сначала выходы
+    схемы, затем входы D и CLK/EN элементов памяти (-1 - не подключен).
+    """
+    def __init__(self, logic, clock_names, state_names, state_kinds):
+        self.logic = logic
+        self.clock_names = clock_names
+        self.state_names = state_names
+        self.state_kinds = state_kinds
+        self.output_count = len(logic.output_names) - 2 * len(state_names)
+        self.input_names = logic.input_names[:logic.input_count - len(clock_names)
+                                             - len(state_names)]
+        self.output_names = logic.output_names[:self.output_count]
+        self.output_slots = logic.outputs[:self.output_count]
+        self.data_slots = logic.outputs[self.output_count::2]
+        self.control_slots = logic.outputs[self.output_count + 1::2]
+        self._run = None
+
+    @property
+    def run(self):
+        """Функция run(state, previous, inputs, start, ticks, mask) для ticks тактов
+
+        Генерируется из расписания при первом обращении: операции идут
+        прямолинейным кодом над локальными переменными, без разбора списка
+        операций в каждом такте. Значения - целые числа, по разряду на
+        независимый набор (mask - единицы во всех разрядах). Возвращает
+        новое состояние, значения CLK прошлого такта и выходы последнего такта.
+        """
+        if self._run is None:
+            namespace = {}
+            exec(self.source(), namespace)
+            self._run = namespace['run']
+        return self._run
+
+    def source(self):
+        """Текст функции run"""
+        logic = self.logic
+        input_count = len(self.input_names)
+        state_base = input_count + len(self.clock_names)
+        names = [f"v{slot}" for slot in range(logic.slot_count)]
+
+        def ref(slot):
+            return names[slot] if slot >= 0 else '0'
+
+        lines = ['def run(state, previous, inputs, start, ticks, M):']
+        for i in range(input_count):
+            lines.append(f"    v{i} = inputs[{i}]")
+        for k in range(len(self.state_names)):
+            lines.append(f"    s{k} = state[{k}]")
+            lines.append(f"    p{k} = previous[{k}]")
+        lines.append('    for t in range(start, start + ticks):')
+        body = []
+        if self.clock_names:
+            body.append(f"    {names[input_count]} = M if t & 1 else 0")
+            for slot in range(input_count + 1, state_base):
+                body.append(f"    v{slot} = {names[input_count]}")
+        for k in range(len(self.state_names)):
+            body.append(f"    v{state_base + k} = s{k}")
+
+        for index, (op, args) in enumerate(logic.ops):
+            operands = [names[arg] for arg in args]
+            if op == OP_AND:
+                expression = ' & '.join(operands)
+            elif op == OP_OR:
+                expression = ' | '.join(operands)
+            elif op == OP_NOT:
+                expression = f"{operands[0]} ^ M"
+            elif op == OP_NAND:
+                expression = f"({' & '.join(operands)}) ^ M"
+            elif op == OP_NOR:
+                expression = f"({' | '.join(operands)}) ^ M"
+            elif op == OP_XOR:
+                expression = ' ^ '.join(operands)
+            elif op == OP_XNOR:
+                expression = f"({' ^ '.join(operands)}) ^ M"
+            elif op == OP_BUF:
+                expression = operands[0]
+            else:
+                expression = '0'
+            body.append(f"    v{logic.input_count + index} = {expression}")
+
+        # Новые значения вычисляются до присваивания, так как D может
+        # зависеть от других элементов памяти
+        for k, kind in enumerate(self.state_kinds):
+            data = ref(self.data_slots[k])
+            control = self.control_slots[k]
+            if kind == KIND_DFF:
+                body.append(f"    n{k} = {data}")
+            elif control < 0:
+                body.append(f"    n{k} = s{k}")
+            elif kind == KIND_DFF_CLOCKED:
+                body.append(f"    e = {names[control]} & (p{k} ^ M)")
+                body.append(f"    p{k} = {names[control]}")
+                body.append(f"    n{k} = ({data} & e) | (s{k} & (e ^ M))")
+            else:
+                body.append(f"    e = {names[control]}")
+                body.append(f"    n{k} = ({data} & e) | (s{k} & (e ^ M))")
+        if self.state_names:
+            targets = ', '.join(f"s{k}" for k in range(len(self.state_names)))
+            values = ', '.join(f"n{k}" for k in range(len(self.state_names)))
+            body.append(f"    {targets} = {values}")
+        if not body:
+            body.append('    pass')
+        lines.extend('    ' + line for line in body)
+
+        state = ', '.join(f"s{k}" for k in range(len(self.state_names)))
+        previous = ', '.join(f"p{k}" for k in range(len(self.state_names)))
+        outputs = ', '.join(ref(slot) for slot in self.output_slots)
+        lines.append(f"    return [{state}], [{previous}], [{outputs}]")
+        return '\n'.join(lines) + '\n'
+
+
+class SequentialSimulator:
+    """Пошаговое моделирование последовательностной схемы
+
+    При lanes больше 1 одновременно моделируется lanes независимых
+    наборов: значения входов, выходов и состояния - слова по разряду на
+    набор. При lanes = 1 значения - 0 или 1.
+    """
+    def __init__(self, netlist, lanes=1):
+        self.netlist = netlist
+        self.mask = (1 << lanes) - 1
+        self.reset()
+
+    def reset(self):
+        """Возврат в начальное состояние"""
+        count = len(self.netlist.state_names)
+        self.state = [0] * count
+        self.previous = [0] * count
+        self.tick = 0
+        self.outputs = [0] * self.netlist.output_count
+
+    def _inputs(self, input_values):
+        """Значения входов, дополненные нулями"""
+        count = len(self.netlist.input_names)
+        values = [int(value) & self.mask for value in input_values[:count]]
+        return values + [0] * (count - len(values))
+
+    def run(self, ticks, input_values=()):
+        """Моделирование ticks тактов с неизменными входами; выходы последнего такта"""
+        if ticks <= 0:
+            return self.outputs
+        self.state, self.previous, self.outputs = self.netlist.run(
+            self.state, self.previous, self._inputs(input_values), self.tick, ticks,
+            self.mask)
+        self.tick += ticks
+        return self.outputs
+
+    def step(self, input_values=()):
+        """Один такт; возвращает выходы этого такта"""
+        return self.run(1, input_values)
+
+    def iter_run(self, stimulus):
+        """Такт на каждый набор входов из stimulus; выдает выходы каждого такта"""
+        for input_values in stimulus:
+            yield list(self.run(1, input_values))
+
+    def value(self, name):
+        """Текущее значение элемента памяти по имени"""
+        return self.state[self.netlist.state_names.index(name)]
+
+    def slot_values(self, input_values=()):
+        """Значения всех ячеек комбинационной части в текущем такте (при lanes = 1)"""
+        netlist = self.netlist
+        clock = bool(self.tick & 1)
+        sources = [bool(value) for value in self._inputs(input_values)]
+        sources += [clock] * len(netlist.clock_names)
+        sources += [bool(value) for value in self.state]
+        return netlist.logic.evaluate_slots(sources)
+
+
+def compile_sequential(gates, input_gates, clock_gates, state_gates, output_gates,
+                       modules=None):
+    """Компиляция схемы с элементами памяти в SequentialNetlist
+
+    Элементы памяти и генераторы CLOCK становятся источниками
+    комбинационной части, поэтому контуры через них не являются
+    комбинационными.
+    """
+    sources = list(input_gates) + list(clock_gates) + list(state_gates)
+    outputs = dict(output_gates)
+    kinds = array('B')
+    for name, gate in state_gates.items():
+        inputs = gate.inputs
+        outputs[f"{name}.D"] = _Pin(inputs[0] if inputs else None)
+        outputs[f"{name}.C"] = _Pin(inputs[1] if len(inputs) > 1 else None)
+        if gate.gate_type == 'LATCH':
+            kinds.append(KIND_LATCH)
+        else:
+            kinds.append(KIND_DFF_CLOCKED if len(inputs) > 1 else KIND_DFF)
+
+    logic = compile_netlist(gates, sources, outputs, modules)
+    return SequentialNetlist(logic, list(clock_gates), list(state_gates), kinds)
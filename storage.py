@@ -0,0 +1,218 @@
+"""Сохранение и загрузка схем в формате JSON и в компактном двоичном формате"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from circuit import GATE_TYPES, Circuit, CircuitError
+from timing import DEFAULT_DELAY
+
+JSON_FORMAT = 'aswt-circuit'
+JSON_VERSION = 1
+
+# Двоичный формат: сигнатура, заголовок, затем секции по порядку
+#   позиции вентилей      float64[2 * gates]
+#   задержки вентилей     float64[gates] (начиная с версии 2)
+#   смещения имен         uint32[gates + 1]
+#   соединения            int32[2 * connections] (номер источника, приемника)
+#   типы вентилей         uint8[gates] (индекс в GATE_TYPES)
+#   имена                 utf-8, смещения указаны выше
+BINARY_MAGIC = b'ASWTNET\x02'
+BINARY_MAGIC_V1 = b'ASWTNET\x01'  # Без задержек, читается с задержками по умолчанию
+BINARY_HEADER = struct.Struct('<III4x')  # вентили, соединения, байт имен
+
+
+def _gates_to_dict(circuit):
+    """Вентили и соединения схемы"""
+    gates = []
+    for gate in circuit.gates.values():
+        entry = {'name': gate.name, 'type': gate.gate_type,
+                 'x': gate.position[0], 'y': gate.position[1], 'delay': gate.delay}
+        if gate.module is not None:
+            entry['module'] = gate.module
+        if gate.pin is not None:
+            entry['pin'] = gate.pin
+        gates.append(entry)
+    # Порядок соединений задает порядок входов вентилей
+    connections = [[conn.source, conn.target] for conn in circuit.connections.values()]
+    return {'gates': gates, 'connections': connections}
+
+
+def circuit_to_dict(circuit):
+    """Представление схемы в виде словаря для JSON
+
+    Определения модулей записываются в порядке создания, поэтому модуль
+    идет после всех модулей, экземпляры которых содержит его тело.
+    """
+    data = {'format': JSON_FORMAT, 'version': JSON_VERSION}
+    data.update(_gates_to_dict(circuit))
+    if circuit.modules:
+        data['modules'] = {name: _gates_to_dict(definition.body)
+                           for name, definition in circuit.modules.items()}
+    return data
+
+
+def _gates_from_dict(circuit, data):
+    """Добавление в схему вентилей и соединений из словаря"""
+    for gate in data['gates']:
+        added = circuit.add_gate(gate['type'], gate['name'], (gate['x'], gate['y']))
+        added.delay = gate.get('delay', DEFAULT_DELAY)
+        added.module = gate.get('module')
+        added.pin = gate.get('pin')
+    for source, target in data['connections']:
+        circuit.connect(source, target)
+
+
+def circuit_from_dict(data):
+    """Создание схемы из словаря, прочитанного из JSON"""
+    if data.get('format') != JSON_FORMAT:
+        raise CircuitError("Файл не является схемой")
+    circuit = Circuit()
+    for name, body_data in data.get('modules', {}).items():
+        body = Circuit()
+        body.modules = circuit.modules
+        _gates_from_dict(body, body_data)
+        circuit.define_module(name, body)
+    _gates_from_dict(circuit, data)
+    return circuit
+
+
+def save_json(circuit, path):
+    """Сохранение схемы в читаемом формате JSON"""
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(circuit_to_dict(circuit), file, ensure_ascii=False, indent=1)
+
+
+def load_json(path):
+    """Загрузка схемы из JSON"""
+    with open(path, encoding='utf-8') as file:
+        return circuit_from_dict(json.load(file))
+
+
+def save_binary(circuit, path):
+    """Сохранение схемы в двоичном формате с целочисленными номерами вентилей"""
+    if circuit.modules:
+        raise CircuitError("Схемы с модулями сохраняются только в JSON")
+    gates = list(circuit.gates.values())
+    ids = {gate.name: index for index, gate in enumerate(gates)}
+
+    positions = array('d')
+    delays = array('d')
+    name_offsets = array('I', [0])
+    names = bytearray()
+    types = array('B')
+    for gate in gates:
+        positions.extend(gate.position)
+        delays.append(gate.delay)
+        names += gate.name.encode('utf-8')
+        name_offsets.append(len(names))
+        types.append(GATE_TYPES.index(gate.gate_type))
+
+    connections = array('i')
+    for conn in circuit.connections.values():
+        connections.append(ids[conn.source])
+        connections.append(ids[conn.target])
+
+    sections = [positions, delays, name_offsets, connections]
+    if sys.byteorder != 'little':
+        for section in sections:
+            section.byteswap()
+
+    with open(path, 'wb') as file:
+        file.write(BINARY_MAGIC)
+        file.write(BINARY_HEADER.pack(len(gates), len(connections) // 2, len(names)))
+        for section in sections:
+            section.tofile(file)
+        types.tofile(file)
+        file.write(names)
+
+
+def _section(view, offset, typecode, count):
+    """Массив из отображенного файла без копирования; возвращает его и новое смещение"""
+    size = array(typecode).itemsize * count
+    data = view[offset:offset + size]
+    if sys.byteorder == 'little':
+        return data.cast(typecode), offset + size
+    # На машинах с обратным порядком байтов приходится копировать
+    result = array(typecode, data.tobytes())
+    result.byteswap()
+    return result, offset + size
+
+
+def load_binary(path):
+    """Загрузка двоичной схемы через отображение файла в память"""
+    if os.path.getsize(path) < len(BINARY_MAGIC) + BINARY_HEADER.size:
+        raise CircuitError("Файл не является схемой")
+
+    with open(path, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            magic = bytes(view[:len(BINARY_MAGIC)])
+            if magic != BINARY_MAGIC and magic != BINARY_MAGIC_V1:
+                raise CircuitError("Файл не является схемой")
+            offset = len(BINARY_MAGIC)
+            gate_count, connection_count, names_size = BINARY_HEADER.unpack_from(view, offset)
+            offset += BINARY_HEADER.size
+
+            # Размер файла должен точно совпадать с заголовком, иначе срезы
+            # секций выйдут за конец файла или имена окажутся обрезанными
+            delay_size = 8 * gate_count if magic == BINARY_MAGIC else 0
+            expected = (offset + 16 * gate_count + delay_size + 4 * (gate_count + 1)
+                        + 8 * connection_count + gate_count + names_size)
+            if len(view) != expected:
+                raise CircuitError(f"Файл схемы поврежден: размер {len(view)} байт, "
+                                   f"по заголовку {expected}")
+
+            positions, offset = _section(view, offset, 'd', 2 * gate_count)
+            delays = None
+            if magic == BINARY_MAGIC:
+                delays, offset = _section(view, offset, 'd', gate_count)
+            name_offsets, offset = _section(view, offset, 'I', gate_count + 1)
+            connections, offset = _section(view, offset, 'i', 2 * connection_count)
+            types, offset = _section(view, offset, 'B', gate_count)
+            names = view[offset:offset + names_size].tobytes()
+            if name_offsets[0] != 0 or name_offsets[gate_count] != names_size or any(
+                    name_offsets[index] > name_offsets[index + 1]
+                    for index in range(gate_count)):
+                raise CircuitError("Файл схемы поврежден: неверные смещения имен")
+            if any(gate_type >= len(GATE_TYPES) for gate_type in types):
+                raise CircuitError("Файл схемы поврежден: неизвестный тип вентиля")
+            if any(not 0 <= gate < gate_count for gate in connections):
+                raise CircuitError("Файл схемы поврежден: неверный номер вентиля")
+
+            circuit = Circuit()
+            gate_names = []
+            for index in range(gate_count):
+                name = names[name_offsets[index]:name_offsets[index + 1]].decode('utf-8')
+                gate = circuit.add_gate(GATE_TYPES[types[index]], name,
+                                        (positions[2 * index], positions[2 * index + 1]))
+                if delays is not None:
+                    gate.delay = delays[index]
+                gate_names.append(name)
+            for index in range(0, 2 * connection_count, 2):
+                circuit.connect(gate_names[connections[index]],
+                                gate_names[connections[index + 1]])
+        finally:
+            # Все срезы должны быть освобождены до закрытия отображения
+            positions = delays = name_offsets = connections = types = None
+            view.release()
+    return circuit
+
+
+def save_circuit(circuit, path):
+    """Сохранение схемы; формат выбирается по расширению (.json - JSON)"""
+    if path.lower().endswith('.json'):
+        save_json(circuit, path)
+    else:
+        save_binary(circuit, path)
+
+
+def load_circuit(path):
+    """Загрузка схемы; формат выбирается по расширению (.json - JSON)"""
+    if path.lower().endswith('.json'):
+        return load_json(path)
+    return load_binary(path)
@@ -0,0 +1,26 @@
+"""Импорт схем из BLIF и структурного Verilog"""
+
+import pytest
+
+from circuit import CircuitError
+from importers import parse_verilog
+
+
+def test_verilog_directives_and_attributes_are_ignored():
+    circuit = parse_verilog("""`timescale 1ns/1ps
+`default_nettype none
+module top (a, b, y, z);
+  input a, b;
+  output y, z;
+  (* keep *) and g1 (y, a, b);
+  (* keep = "true" *)
+  buf (z, a);
+endmodule
+""")
+    assert circuit.simulate([True, True]) == [True, True]
+    assert circuit.simulate([True, False]) == [False, True]
+
+
+def test_verilog_unknown_statement_raises_circuit_error():
+    with pytest.raises(CircuitError):
+        parse_verilog("module top (a, y);\n input a;\n output y;\n #1 buf (y, a);\nendmodule\n")
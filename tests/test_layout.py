@@ -0,0 +1,48 @@
+"""Размещение схемы по уровням"""
+
+from circuit import Circuit
+from layout import gate_levels, layered_layout
+
+
+def counter(bits):
+    """Двоичный счетчик на DFF: бит i переключается, когда младшие биты равны 1"""
+    circuit = Circuit()
+    circuit.add_gate('INPUT', 'en')
+    carry = 'en'
+    for i in range(bits):
+        circuit.add_gate('DFF', f"q{i}")
+        circuit.add_gate('XOR', f"t{i}")
+        circuit.connect(f"q{i}", f"t{i}")
+        circuit.connect(carry, f"t{i}")
+        circuit.connect(f"t{i}", f"q{i}")
+        circuit.add_gate('AND', f"c{i}")
+        circuit.connect(f"q{i}", f"c{i}")
+        circuit.connect(carry, f"c{i}")
+        carry = f"c{i}"
+        circuit.add_gate('OUTPUT', f"out{i}")
+        circuit.connect(f"q{i}", f"out{i}")
+    return circuit
+
+
+def test_counter_levels_follow_carry_chain():
+    circuit = counter(4)
+    levels = gate_levels(circuit)
+
+    for i in range(4):
+        assert levels[f"q{i}"] == 0
+    # Уровни цепочки переноса различны и растут
+    chain = [levels[f"c{i}"] for i in range(4)]
+    assert chain == sorted(set(chain))
+    for name in circuit.gates:
+        if name in circuit.state_gates or name in circuit.input_gates:
+            continue
+        for source in circuit.fanin[name]:
+            assert levels[source] < levels[name]
+    assert len(set(levels.values())) > 3
+
+
+def test_counter_layout_uses_several_columns():
+    circuit = counter(4)
+    layered_layout(circuit)
+    columns = {gate.position[0] for gate in circuit.gates.values()}
+    assert len(columns) > 3
@@ -0,0 +1,99 @@
+"""Экземпляры модулей: компиляция и развернутая схема"""
+
+from circuit import Circuit
+from netlist import HIERARCHY_SEPARATOR
+
+
+def and_module(circuit):
+    """Модуль AND2: y = a AND b"""
+    body = Circuit()
+    body.add_gate('INPUT', 'a')
+    body.add_gate('INPUT', 'b')
+    body.add_gate('AND', 'g')
+    body.add_gate('OUTPUT', 'y')
+    body.connect('a', 'g')
+    body.connect('b', 'g')
+    body.connect('g', 'y')
+    circuit.define_module('AND2', body)
+
+
+def test_partially_connected_instance_matches_flattened():
+    circuit = Circuit()
+    and_module(circuit)
+    circuit.add_gate('INPUT', 'x')
+    instance = circuit.add_instance('AND2')
+    circuit.connect('x', instance.name)
+    circuit.add_gate('OUTPUT', 'out')
+    circuit.connect(f"{instance.name}.y", 'out')
+
+    assert circuit.simulate([True]) == [False]
+    simulator = circuit.timing_simulator([True])
+    assert simulator.outputs() == circuit.simulate([True])
+    assert circuit.flatten().simulate([True]) == [False]
+
+
+def test_connected_instance_matches_flattened():
+    circuit = Circuit()
+    and_module(circuit)
+    circuit.add_gate('INPUT', 'x')
+    circuit.add_gate('INPUT', 'z')
+    instance = circuit.add_instance('AND2')
+    circuit.connect('x', instance.name)
+    circuit.connect('z', instance.name)
+    circuit.add_gate('OUTPUT', 'out')
+    circuit.connect(f"{instance.name}.y", 'out')
+
+    for values in ([False, False], [True, False], [True, True]):
+        simulator = circuit.timing_simulator(values)
+        assert simulator.outputs() == circuit.simulate(values) == [all(values)]
+
+
+def test_instance_arrival_matches_flat_circuit():
+    hierarchical = Circuit()
+    and_module(hierarchical)
+    hierarchical.add_gate('INPUT', 'x')
+    hierarchical.add_gate('INPUT', 'z')
+    instance = hierarchical.add_instance('AND2')
+    hierarchical.connect('x', instance.name)
+    hierarchical.connect('z', instance.name)
+    hierarchical.add_gate('NOT', 'n')
+    hierarchical.connect(f"{instance.name}.y", 'n')
+    hierarchical.add_gate('OUTPUT', 'out')
+    hierarchical.connect('n', 'out')
+
+    flat = Circuit()
+    flat.add_gate('INPUT', 'x')
+    flat.add_gate('INPUT', 'z')
+    flat.add_gate('AND', 'g')
+    flat.add_gate('NOT', 'n')
+    flat.add_gate('OUTPUT', 'out')
+    for source, target in [('x', 'g'), ('z', 'g'), ('g', 'n'), ('n', 'out')]:
+        flat.connect(source, target)
+
+    for circuit in (hierarchical, flat):
+        simulator = circuit.timing_simulator([False, False])
+        assert simulator.apply([True, True]) == [2]
+
+
+def test_spliced_slot_names_match_flattened_gates():
+    circuit = Circuit()
+    and_module(circuit)
+    circuit.add_gate('INPUT', 'x')
+    circuit.add_gate('INPUT', 'z')
+    previous = 'x'
+    for _ in range(3):
+        instance = circuit.add_instance('AND2')
+        circuit.connect(previous, instance.name)
+        circuit.connect('z', instance.name)
+        previous = f"{instance.name}.y"
+    circuit.add_gate('OUTPUT', 'out')
+    circuit.connect(previous, 'out')
+
+    netlist = circuit.get_netlist()
+    names = list(netlist.slot_names)
+    assert len(names) == netlist.slot_count
+    assert names == [netlist.slot_names[slot] for slot in range(netlist.slot_count)]
+    assert netlist.slot_names[-1] == names[-1]
+    assert netlist.slot_names[1:4] == names[1:4]
+    assert set(names) <= set(circuit.flatten().gates)
+    assert sum(HIERARCHY_SEPARATOR in name for name in names) == 3
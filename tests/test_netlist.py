@@ -0,0 +1,69 @@
+"""Вычисление скомпилированной схемы разными способами"""
+
+import itertools
+import pickle
+
+import pytest
+
+from circuit import Circuit
+from incremental import IncrementalSimulator
+from netlist import evaluate_op
+from timing import TimingSimulator
+
+EXPECTED = {
+    'AND': all,
+    'OR': any,
+    'NAND': lambda values: not all(values),
+    'NOR': lambda values: not any(values),
+    'XOR': lambda values: sum(values) % 2 == 1,
+    'XNOR': lambda values: sum(values) % 2 == 0,
+}
+
+
+def single_gate(gate_type, width):
+    circuit = Circuit()
+    circuit.add_gate(gate_type, 'g')
+    for index in range(width):
+        circuit.add_gate('INPUT', f"x{index}")
+        circuit.connect(f"x{index}", 'g')
+    circuit.add_gate('OUTPUT', 'y')
+    circuit.connect('g', 'y')
+    return circuit
+
+
+@pytest.mark.parametrize('gate_type', sorted(EXPECTED))
+@pytest.mark.parametrize('width', [1, 2, 3, 5])
+def test_wide_gates_agree_across_engines(gate_type, width):
+    netlist = single_gate(gate_type, width).get_netlist()
+    rows = list(itertools.product([False, True], repeat=width))
+    expected = [EXPECTED[gate_type](row) for row in rows]
+
+    assert [netlist.evaluate(row)[0] for row in rows] == expected
+    op, args = netlist.ops[0]
+    for row, value in zip(rows, expected):
+        assert evaluate_op(op, args, list(row) + [False]) == value
+    table = [row[0] == '1' for row in netlist.iter_truth_table()]
+    assert table == expected
+
+
+def test_buf_repeats_input():
+    netlist = single_gate('BUF', 1).get_netlist()
+    assert netlist.evaluate([True]) == [True]
+    assert netlist.evaluate([False]) == [False]
+    assert [row[0] for row in netlist.iter_truth_table()] == ['0', '1']
+
+
+def test_fanout_is_shared_by_simulators():
+    circuit = single_gate('AND', 2)
+    circuit.add_gate('NOT', 'n')
+    circuit.connect('x0', 'n')
+    circuit.add_gate('OUTPUT', 'z')
+    circuit.connect('n', 'z')
+    netlist = circuit.get_netlist()
+    slots = netlist.slots
+
+    assert sorted(netlist.fanout[slots['x0']]) == sorted([slots['g'], slots['n']])
+    assert netlist.fanout[slots['x1']] == [slots['g']]
+    assert IncrementalSimulator(netlist).fanout is netlist.fanout
+    assert TimingSimulator(netlist, [1] * netlist.slot_count).fanout is netlist.fanout
+    assert pickle.loads(pickle.dumps(netlist))._fanout is None
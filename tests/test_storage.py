@@ -0,0 +1,58 @@
+"""Сохранение и загрузка схем"""
+
+import pytest
+
+import storage
+from circuit import Circuit, CircuitError
+
+
+def adder():
+    """Полусумматор с выходами sum и cout"""
+    circuit = Circuit()
+    circuit.add_gate('INPUT', 'a', (10, 20))
+    circuit.add_gate('INPUT', 'b', (10, 80))
+    circuit.add_gate('XOR', 'x')
+    circuit.add_gate('AND', 'c')
+    circuit.add_gate('OUTPUT', 'sum')
+    circuit.add_gate('OUTPUT', 'cout')
+    for source, target in [('a', 'x'), ('b', 'x'), ('a', 'c'), ('b', 'c'),
+                           ('x', 'sum'), ('c', 'cout')]:
+        circuit.connect(source, target)
+    return circuit
+
+
+def test_binary_round_trip(tmp_path):
+    path = str(tmp_path / 'adder.circ')
+    storage.save_binary(adder(), path)
+    loaded = storage.load_binary(path)
+    assert list(loaded.gates) == list(adder().gates)
+    assert loaded.gates['a'].position == (10, 20)
+    assert list(loaded.iter_truth_table()) == list(adder().iter_truth_table())
+
+
+@pytest.mark.parametrize('cut', [1, 2, 3, 10, 40])
+def test_truncated_binary_is_rejected(tmp_path, cut):
+    path = tmp_path / 'adder.circ'
+    storage.save_binary(adder(), str(path))
+    data = path.read_bytes()
+    path.write_bytes(data[:-cut])
+    with pytest.raises(CircuitError):
+        storage.load_binary(str(path))
+
+
+def test_every_truncation_is_rejected(tmp_path):
+    path = tmp_path / 'adder.circ'
+    storage.save_binary(adder(), str(path))
+    data = path.read_bytes()
+    for size in range(len(data)):
+        path.write_bytes(data[:size])
+        with pytest.raises(CircuitError):
+            storage.load_binary(str(path))
+
+
+def test_oversized_binary_is_rejected(tmp_path):
+    path = tmp_path / 'adder.circ'
+    storage.save_binary(adder(), str(path))
+    path.write_bytes(path.read_bytes() + b'\0' * 8)
+    with pytest.raises(CircuitError):
+        storage.load_binary(str(path))
@@ -0,0 +1,206 @@
+"""Событийное моделирование с задержками распространения вентилей"""
+
+import heapq
+
+from netlist import evaluate_op
+
+# Задержка вентиля по умолчанию, в условных единицах времени
+DEFAULT_DELAY = 1
+
+
+def slot_delays(netlist, gates):
+    """Задержки по ячейкам скомпилированной схемы; у входов задержки нет"""
+    delays = [0] * netlist.slot_count
+    for slot in range(netlist.input_count, netlist.slot_count):
+        delays[slot] = gates[netlist.slot_names[slot]].delay
+    return delays
+
+
+def critical_paths(netlist, delays):
+    """Статическое время прихода сигнала на каждый выход и критический путь
+
+    Возвращает список (время, список имен вентилей от входа к выходу) по
+    выходам; для неподключенного выхода - (None, []). Время прихода ячейки -
+    ее задержка плюс наибольшее время прихода ее входов.
+    """
+    arrival = [0] * netlist.slot_count
+    latest = [-1] * netlist.slot_count  # Вход с наибольшим временем прихода
+    base = netlist.input_count
+    for index, (op, args) in enumerate(netlist.ops):
+        slot = base + index
+        if args:
+            source = max(args, key=arrival.__getitem__)
+            latest[slot] = source
+            arrival[slot] = arrival[source] + delays[slot]
+        else:
+            arrival[slot] = delays[slot]
+
+    result = []
+    for slot in netlist.outputs:
+        if slot < 0:
+            result.append((None, []))
+            continue
+        path = []
+        node = slot
+        while node >= 0:
+            path.append(netlist.slot_names[node])
+            node = latest[node]
+        result.append((arrival[slot], path[::-1]))
+    return result
+
+
+class TimingSimulator:
+    """Моделирование с транспортной задержкой на очереди событий
+
+    Событие - (время, номер, ячейка, значение) в двоичной куче, поэтому
+    добавление и извлечение занимают O(log n). Все события одного момента
+    применяются вместе, затем каждый затронутый вентиль вычисляется один
+    раз, и его новое значение планируется через его задержку. Импульсы
+    короче задержки не подавляются, поэтому состязания видны на выходах.
+
+    Ступень - подача набора входов и моделирование до следующей ступени
+    или до затухания. Для каждой ступени запоминаются ячейки, значение
+    которых менялось больше одного раза (glitches), и время последнего
+    изменения каждого выхода относительно начала ступени.
+    """
+    def __init__(self, netlist, delays, input_values=()):
+        self.netlist = netlist
+        self.delays = delays
+
+        self.fanout = netlist.fanout
+
+        self.listeners = []  # Функции listener(время, ячейка, значение)
+        self.reset(input_values)
+
+    def reset(self, input_values=()):
+        """Установившееся состояние для заданных входов в момент 0"""
+        self.values = self.netlist.evaluate_slots(tuple(input_values))
+        self.projected = list(self.values)  # Последнее запланированное значение
+        self.queue = []
+        self.counter = 0
+        self.time = 0
+        self.step_time = 0
+        self.changes = {}  # Ячейка -> [первое изменение, последнее, число] за ступень
+        self.glitches = []  # (имя, начало, конец, число изменений)
+        self.worst_arrivals = [None] * len(self.netlist.outputs)
+
+    def add_listener(self, listener):
+        """Подписка на изменения значений: listener(время, ячейка, значение)"""
+        self.listeners.append(listener)
+
+    def schedule(self, time, slot, value):
+        """Планирование изменения ячейки"""
+        self.counter += 1
+        heapq.heappush(self.queue, (time, self.counter, slot, value))
+
+    def set_inputs(self, input_values, time=None):
+        """Начало ступени: изменение входов в момент time (по умолчанию - текущий)"""
+        if time is None:
+            time = self.time
+        if time < self.time:
+            raise ValueError("Нельзя подать входы в прошедший момент времени")
+        self.finish_step()
+        self.step_time = time
+        for index, value in enumerate(input_values[:self.netlist.input_count]):
+            value = bool(value)
+            if value != self.projected[index]:
+                self.projected[index] = value
+                self.schedule(time, index, value)
+
+    def run(self, until=None):
+        """Обработка событий до момента until (не включая) или до затухания
+
+        Возвращает число примененных изменений.
+        """
+        netlist = self.netlist
+        ops = netlist.ops
+        base = netlist.input_count
+        queue = self.queue
+        values = self.values
+        projected = self.projected
+        delays = self.delays
+        fanout = self.fanout
+        changes = self.changes
+        listeners = self.listeners
+        applied = 0
+
+        while queue and (until is None or queue[0][0] < until):
+            time = queue[0][0]
+            self.time = time
+            touched = set()
+            while queue and queue[0][0] == time:
+                _, _, slot, value = heapq.heappop(queue)
+                if values[slot] == value:
+                    continue
+                values[slot] = value
+                applied += 1
+                record = changes.get(slot)
+                if record is None:
+                    changes[slot] = [time, time, 1]
+                else:
+                    record[1] = time
+                    record[2] += 1
+                for listener in listeners:
+                    listener(time, slot, value)
+                touched.update(fanout[slot])
+
+            for slot in touched:
+                op, args = ops[slot - base]
+                result = evaluate_op(op, args, values)
+                if result != projected[slot]:
+                    projected[slot] = result
+                    self.schedule(time + delays[slot], slot, result)
+
+        if until is not None and until > self.time:
+            self.time = until
+        return applied
+
+    def finish_step(self):
+        """Завершение ступени: учет состязаний и времени прихода на выходы
+
+        Возвращает время последнего изменения каждого выхода от начала
+        ступени (None, если выход не менялся).
+        """
+        names = self.netlist.slot_names
+        for slot, (first, last, count) in self.changes.items():
+            if count > 1:
+                self.glitches.append((names[slot], first, last, count))
+
+        arrivals = []
+        for index, slot in enumerate(self.netlist.outputs):
+            record = self.changes.get(slot) if slot >= 0 else None
+            arrival = record[1] - self.step_time if record else None
+            arrivals.append(arrival)
+            worst = self.worst_arrivals[index]
+            if arrival is not None and (worst is None or arrival > worst):
+                self.worst_arrivals[index] = arrival
+        self.changes.clear()
+        return arrivals
+
+    def apply(self, input_values, time=None):
+        """Ступень до затухания; возвращает время прихода на выходы"""
+        self.set_inputs(input_values, time)
+        self.run()
+        return self.finish_step()
+
+    def run_stimulus(self, stimulus, period=None):
+        """Последовательность ступеней; выдает время прихода на выходы для каждой
+
+        Без period каждая ступень моделируется до затухания. С period набор
+        k подается в момент начало + k * period, даже если схема еще не
+        затихла после предыдущего.
+        """
+        start = self.time
+        for index, input_values in enumerate(stimulus):
+            if period is None:
+                yield self.apply(input_values)
+                continue
+            time = start + index * period
+            self.set_inputs(input_values, time)
+            self.run(until=time + period)
+            yield self.finish_step()
+
+    def outputs(self):
+        """Текущие значения выходов"""
+        values = self.values
+        return [values[slot] if slot >= 0 else False for slot in self.netlist.outputs]
@@ -0,0 +1,200 @@
+"""Кэш столбцов таблиц истинности по структурному хэшу схемы"""
+
+import hashlib
+import os
+import struct
+import sys
+from collections import OrderedDict
+
+from netlist import BLOCK_ROWS, CompiledNetlist
+
+# Объем кэша в памяти и на диске по умолчанию, байт
+CACHE_BYTES = 64 << 20
+SPILL_BYTES = 1 << 30
+
+# Заголовок блока на диске: байт в слове и число выходов
+SPILL_HEADER = struct.Struct('<II')
+
+
+def structural_hash(netlist):
+    """Хэш структуры скомпилированной схемы без учета имен вентилей
+
+    Схемы с одинаковыми операциями, соединениями и порядком входов и
+    выходов имеют одинаковый хэш, поэтому таблица истинности общей
+    подсхемы находится в кэше и для другой схемы.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack('<II', netlist.input_count, len(netlist.outputs)))
+    for data in (netlist.op_types, netlist.fanin_offsets, netlist.fanin, netlist.outputs):
+        if sys.byteorder != 'little' and data.itemsize > 1:
+            data = data[:]
+            data.byteswap()
+        digest.update(struct.pack('<I', len(data)))
+        digest.update(data.tobytes())
+    return digest.hexdigest()
+
+
+class TruthTableCache:
+    """Ограниченный LRU-кэш блоков столбцов выходов
+
+    Ключ - (хэш схемы, номер блока), значение - слова выходов блока из
+    BLOCK_ROWS строк. Вытесненные блоки при заданном spill_dir
+    записываются на диск и читаются оттуда при следующем обращении;
+    на диске тоже хранится не больше spill_bytes.
+    """
+    def __init__(self, max_bytes=CACHE_BYTES, spill_dir=None, spill_bytes=SPILL_BYTES):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_bytes = spill_bytes
+        self.blocks = OrderedDict()  # Ключ -> (слова, размер)
+        self.size = 0
+        self.spilled = OrderedDict()  # Ключ -> размер файла
+        self.spilled_size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Слова блока или None"""
+        entry = self.blocks.get(key)
+        if entry is not None:
+            self.blocks.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+        if key in self.spilled:
+            words = self._read_spilled(key)
+            if words is not None:
+                self.hits += 1
+                self.put(key, words)
+                return words
+        self.misses += 1
+        return None
+
+    def put(self, key, words):
+        """Добавление блока с вытеснением самых давних"""
+        if key in self.blocks:
+            self.blocks.move_to_end(key)
+            return
+        size = sum((word.bit_length() + 7) // 8 for word in words) + 64
+        self.blocks[key] = (words, size)
+        self.size += size
+        while self.size > self.max_bytes and len(self.blocks) > 1:
+            old_key, (old_words, old_size) = self.blocks.popitem(last=False)
+            self.size -= old_size
+            if self.spill_dir is not None:
+                self._spill(old_key, old_words)
+
+    def clear(self):
+        """Очистка кэша в памяти и на диске"""
+        self.blocks.clear()
+        self.size = 0
+        for key in list(self.spilled):
+            self._remove_spilled(key)
+
+    def _path(self, key):
+        digest, block = key
+        return os.path.join(self.spill_dir, f"{digest}_{block}.bin")
+
+    def _spill(self, key, words):
+        """Запись вытесненного блока на диск"""
+        if key in self.spilled:
+            return
+        width = max(((word.bit_length() + 7) // 8 for word in words), default=0)
+        os.makedirs(self.spill_dir, exist_ok=True)
+        with open(self._path(key), 'wb') as file:
+            file.write(SPILL_HEADER.pack(width, len(words)))
+            for word in words:
+                file.write(word.to_bytes(width, 'little'))
+        size = SPILL_HEADER.size + width * len(words)
+        self.spilled[key] = size
+        self.spilled_size += size
+        while self.spilled_size > self.spill_bytes and len(self.spilled) > 1:
+            self._remove_spilled(next(iter(self.spilled)))
+
+    def _read_spilled(self, key):
+        """Чтение блока с диска или None, если файл пропал"""
+        try:
+            with open(self._path(key), 'rb') as file:
+                width, count = SPILL_HEADER.unpack(file.read(SPILL_HEADER.size))
+                words = [int.from_bytes(file.read(width), 'little') for _ in range(count)]
+        except OSError:
+            self._remove_spilled(key)
+            return None
+        self.spilled.move_to_end(key)
+        return words
+
+    def _remove_spilled(self, key):
+        self.spilled_size -= self.spilled.pop(key)
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+# Общий кэш для всех схем
+default_cache = TruthTableCache()
+
+
+class CachedNetlist(CompiledNetlist):
+    """Скомпилированная схема, блоки таблицы истинности которой берутся из кэша
+
+    Использует массивы исходной схемы без копирования. При передаче в
+    процесс-исполнитель кэш не копируется.
+    """
+    def __init__(self, netlist, cache=None):
+        super().__init__(netlist.input_names, netlist.output_names, netlist.op_types,
+                         netlist.fanin_offsets, netlist.fanin, netlist.outputs,
+                         netlist.slot_names)
+        self.cache = default_cache if cache is None else cache
+        self.digest = structural_hash(netlist)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state['cache'] = None
+        return state
+
+    def block_words(self, block):
+        """Слова выходов выровненного блока с номером block"""
+        words = self.cache.get((self.digest, block)) if self.cache else None
+        if words is None:
+            start = block * BLOCK_ROWS
+            count = min(BLOCK_ROWS, (1 << self.input_count) - start)
+            words = super().truth_table_block(start, count)
+            if self.cache:
+                self.cache.put((self.digest, block), words)
+        return words
+
+    def is_cached(self, start, stop):
+        """Все ли блоки строк start..stop-1 есть в кэше в памяти"""
+        if not self.cache:
+            return False
+        blocks = self.cache.blocks
+        return all((self.digest, block) in blocks
+                   for block in range(start // BLOCK_ROWS, -(-stop // BLOCK_ROWS)))
+
+    def store_words(self, start, count, words):
+        """Сохранение вычисленных в другом процессе слов выровненного диапазона"""
+        if not self.cache or start % BLOCK_ROWS:
+            return
+        for offset in range(0, count, BLOCK_ROWS):
+            rows = min(BLOCK_ROWS, count - offset)
+            if rows < BLOCK_ROWS and start + offset + rows != 1 << self.input_count:
+                break
+            mask = (1 << rows) - 1
+            self.cache.put((self.digest, (start + offset) // BLOCK_ROWS),
+                           [(word >> offset) & mask for word in words])
+
+    def truth_table_block(self, start, count):
+        """Слова выходов для строк start..start+count-1, собранные из блоков кэша"""
+        words = [0] * len(self.outputs)
+        stop = start + count
+        row = start
+        while row < stop:
+            block = row // BLOCK_ROWS
+            offset = row - block * BLOCK_ROWS
+            rows = min(BLOCK_ROWS - offset, stop - row)
+            mask = (1 << rows) - 1
+            shift = row - start
+            for i, word in enumerate(self.block_words(block)):
+                words[i] |= ((word >> offset) & mask) << shift
+            row += rows
+        return words
@@ -0,0 +1,96 @@
+"""Параллельное построение таблицы истинности для широких схем"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from netlist import BLOCK_ROWS, unpack_rows
+from truthcache import CachedNetlist
+
+# Меньшие таблицы быстрее посчитать в одном процессе
+PARALLEL_MIN_ROWS = 1 << 16
+
+# Диапазонов на процесс, чтобы выровнять нагрузку
+CHUNKS_PER_WORKER = 4
+
+# Наибольший диапазон одного задания, ограничивает память под результат
+MAX_RANGE_ROWS = 1 << 20
+
+# Скомпилированная схема, загруженная в процесс-исполнитель
+_worker_netlist = None
+
+
+def _init_worker(netlist):
+    """Инициализация процесса-исполнителя собственной копией схемы"""
+    global _worker_netlist
+    _worker_netlist = netlist
+
+
+def _evaluate_range(start, stop):
+    """Слова выходов для диапазона строк в процессе-исполнителе"""
+    return _worker_netlist.truth_table_words(start, stop)
+
+
+def split_range(start, stop, parts):
+    """Разбиение строк start..stop-1 на parts смежных диапазонов
+
+    Границы выравниваются на BLOCK_ROWS строк от начала.
+    """
+    blocks = -(-(stop - start) // BLOCK_ROWS)
+    parts = max(1, min(parts, blocks))
+    bounds = [min(stop, start + blocks * i // parts * BLOCK_ROWS) for i in range(parts + 1)]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def evaluate_ranges(netlist, start=0, stop=None, workers=None):
+    """Слова выходов по смежным диапазонам строк, по порядку
+
+    Возвращает кортежи (начало диапазона, число строк, слова выходов).
+    Диапазоны вычисляются в пуле процессов, каждый из которых получает
+    копию скомпилированной схемы один раз при запуске. Заданий в работе
+    не больше двух на процесс, так что память не зависит от размера таблицы.
+    Для CachedNetlist готовые блоки берутся из кэша, а вычисленные
+    в процессах - сохраняются в нем.
+    """
+    if stop is None:
+        stop = 1 << netlist.input_count
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    cached = isinstance(netlist, CachedNetlist)
+    if (workers <= 1 or stop - start < PARALLEL_MIN_ROWS
+            or cached and netlist.is_cached(start, stop)):
+        for block_start in range(start, stop, BLOCK_ROWS):
+            count = min(BLOCK_ROWS, stop - block_start)
+            yield block_start, count, netlist.truth_table_block(block_start, count)
+        return
+
+    parts = max(workers * CHUNKS_PER_WORKER, -(-(stop - start) // MAX_RANGE_ROWS))
+    ranges = iter(split_range(start, stop, parts))
+    pending = deque()
+    # fork процесса с Tk небезопасен, поэтому исполнители запускаются заново
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(workers, mp_context=context,
+                             initializer=_init_worker, initargs=(netlist,)) as executor:
+        for range_start, range_stop in ranges:
+            pending.append((range_start, range_stop,
+                            executor.submit(_evaluate_range, range_start, range_stop)))
+            if len(pending) >= workers * 2:
+                range_start, range_stop, future = pending.popleft()
+                words = future.result()
+                if cached:
+                    netlist.store_words(range_start, range_stop - range_start, words)
+                yield range_start, range_stop - range_start, words
+        while pending:
+            range_start, range_stop, future = pending.popleft()
+            words = future.result()
+            if cached:
+                netlist.store_words(range_start, range_stop - range_start, words)
+            yield range_start, range_stop - range_start, words
+
+
+def iter_truth_table_parallel(netlist, start=0, stop=None, workers=None):
+    """Строки таблицы истинности, вычисляемые в нескольких процессах"""
+    for _, count, words in evaluate_ranges(netlist, start, stop, workers):
+        yield from unpack_rows(words, count)
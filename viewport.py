@@ -0,0 +1,131 @@
+"""Видимая область холста: преобразование координат и пространственный индекс"""
+
+import math
+
+# Размер ячейки пространственного индекса в координатах схемы
+CELL_SIZE = 200
+
+
+class Viewport:
+    """Преобразование координат схемы в экранные: сдвиг и масштаб"""
+    MIN_ZOOM = 0.05
+    MAX_ZOOM = 4.0
+
+    def __init__(self):
+        self.x = 0.0  # Точка схемы в левом верхнем углу холста
+        self.y = 0.0
+        self.zoom = 1.0
+
+    def to_screen(self, x, y):
+        """Координаты схемы -> координаты холста"""
+        return (x - self.x) * self.zoom, (y - self.y) * self.zoom
+
+    def to_world(self, x, y):
+        """Координаты холста -> координаты схемы"""
+        return self.x + x / self.zoom, self.y + y / self.zoom
+
+    def pan(self, dx, dy):
+        """Сдвиг изображения на dx, dy точек экрана"""
+        self.x -= dx / self.zoom
+        self.y -= dy / self.zoom
+
+    def zoom_at(self, factor, x, y):
+        """Изменение масштаба с неподвижной точкой экрана (x, y)"""
+        world_x, world_y = self.to_world(x, y)
+        self.zoom = min(self.MAX_ZOOM, max(self.MIN_ZOOM, self.zoom * factor))
+        self.x = world_x - x / self.zoom
+        self.y = world_y - y / self.zoom
+
+    def world_rect(self, width, height, margin=0):
+        """Прямоугольник схемы, видимый на холсте размером width x height"""
+        x0, y0 = self.to_world(0, 0)
+        x1, y1 = self.to_world(width, height)
+        return x0 - margin, y0 - margin, x1 + margin, y1 + margin
+
+
+class SpatialIndex:
+    """Равномерная сетка ячеек для поиска вентилей и соединений в прямоугольнике
+
+    Вентиль хранится в ячейке своего центра, соединение - во всех ячейках,
+    через которые проходит его отрезок, так что находятся и длинные
+    соединения, оба конца которых за пределами видимой области.
+    """
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = cell_size
+        self.clear()
+
+    def clear(self):
+        """Удаление всех записей"""
+        self.gate_cells = {}  # Ячейка -> множество имен вентилей
+        self.gate_cell = {}  # Имя вентиля -> ячейка
+        self.wire_cells = {}  # Ячейка -> множество ключей соединений
+        self.wire_cell_sets = {}  # Ключ соединения -> его ячейки
+
+    def cell(self, x, y):
+        """Ячейка, содержащая точку"""
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def add_gate(self, name, x, y):
+        """Добавление вентиля с центром в точке (x, y)"""
+        cell = self.cell(x, y)
+        self.gate_cell[name] = cell
+        self.gate_cells.setdefault(cell, set()).add(name)
+
+    def remove_gate(self, name):
+        """Удаление вентиля"""
+        cell = self.gate_cell.pop(name, None)
+        if cell is not None:
+            names = self.gate_cells[cell]
+            names.discard(name)
+            if not names:
+                del self.gate_cells[cell]
+
+    def move_gate(self, name, x, y):
+        """Перемещение вентиля; индекс меняется только при смене ячейки"""
+        if self.gate_cell.get(name) != self.cell(x, y):
+            self.remove_gate(name)
+            self.add_gate(name, x, y)
+
+    def add_wire(self, key, x0, y0, x1, y1):
+        """Добавление соединения-отрезка"""
+        # Точки берутся с шагом в половину ячейки, чтобы не пропустить ни одной
+        steps = int(max(abs(x1 - x0), abs(y1 - y0)) * 2 / self.cell_size) + 1
+        cells = {self.cell(x0 + (x1 - x0) * i / steps, y0 + (y1 - y0) * i / steps)
+                 for i in range(steps + 1)}
+        self.wire_cell_sets[key] = cells
+        for cell in cells:
+            self.wire_cells.setdefault(cell, set()).add(key)
+
+    def remove_wire(self, key):
+        """Удаление соединения"""
+        for cell in self.wire_cell_sets.pop(key, ()):
+            keys = self.wire_cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self.wire_cells[cell]
+
+    def query(self, x0, y0, x1, y1):
+        """Вентили и соединения, попадающие в прямоугольник: (имена, ключи)"""
+        cx0, cy0 = self.cell(x0, y0)
+        cx1, cy1 = self.cell(x1, y1)
+        gates = set()
+        wires = set()
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.gate_cells) + len(self.wire_cells):
+            # Прямоугольник больше занятой части сетки - перебираем занятые ячейки
+            for (cx, cy), names in self.gate_cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    gates |= names
+            for (cx, cy), keys in self.wire_cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    wires |= keys
+            return gates, wires
+
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                names = self.gate_cells.get((cx, cy))
+                if names:
+                    gates |= names
+                keys = self.wire_cells.get((cx, cy))
+                if keys:
+                    wires |= keys
+        return gates, wires
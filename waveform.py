@@ -0,0 +1,147 @@
+"""Запись временных диаграмм сигналов и выгрузка в формат VCD"""
+
+import heapq
+from array import array
+from bisect import bisect_right
+
+# Символы идентификаторов сигналов VCD
+VCD_ID_CHARS = ''.join(chr(code) for code in range(33, 127))
+
+
+def vcd_identifier(index):
+    """Короткий идентификатор сигнала VCD по его номеру"""
+    base = len(VCD_ID_CHARS)
+    identifier = VCD_ID_CHARS[index % base]
+    index //= base
+    while index:
+        index -= 1
+        identifier += VCD_ID_CHARS[index % base]
+        index //= base
+    return identifier
+
+
+class WaveformRecorder:
+    """Изменения значений выбранных вентилей во времени
+
+    Для каждого сигнала хранятся начальное значение и моменты изменений.
+    Сигнал двоичный, поэтому каждое изменение - инверсия, и значения
+    хранить не нужно: память пропорциональна числу переключений, а не
+    числу шагов, умноженному на число сигналов.
+
+    Запись ведется по ячейкам скомпилированной схемы: OUTPUT записывается
+    по ячейке своего источника, неподключенный OUTPUT всегда равен 0.
+    """
+    def __init__(self, netlist, names=None, values=None):
+        if names is None:
+            names = netlist.input_names + netlist.output_names
+        outputs = dict(zip(netlist.output_names, netlist.outputs))
+        self.netlist = netlist
+        self.names = list(names)
+        self.signal_slots = []
+        self.by_slot = {}  # Ячейка -> номера сигналов
+        for index, name in enumerate(self.names):
+            slot = outputs[name] if name in outputs else netlist.slots.get(name)
+            if slot is None:
+                raise KeyError(f"Вентиль {name} не найден в схеме")
+            self.signal_slots.append(slot)
+            if slot >= 0:
+                self.by_slot.setdefault(slot, []).append(index)
+
+        self.initial = [False] * len(self.names)
+        self.current = [False] * len(self.names)
+        self.times = [array('d') for _ in self.names]
+        if values is not None:
+            self.start(values)
+
+    def start(self, values):
+        """Начальные значения из списка значений ячеек; записи очищаются"""
+        for index, slot in enumerate(self.signal_slots):
+            value = bool(values[slot]) if slot >= 0 else False
+            self.initial[index] = value
+            self.current[index] = value
+            self.times[index] = array('d')
+
+    def on_change(self, time, slot, value):
+        """Изменение ячейки; подходит как обработчик TimingSimulator.add_listener"""
+        signals = self.by_slot.get(slot)
+        if signals:
+            value = bool(value)
+            for index in signals:
+                if self.current[index] != value:
+                    self.current[index] = value
+                    self.times[index].append(time)
+
+    def attach(self, simulator):
+        """Запись всех изменений событийного моделирования"""
+        self.start(simulator.values)
+        simulator.add_listener(self.on_change)
+
+    def record_changes(self, time, slots, values):
+        """Изменения ячеек slots, например из IncrementalSimulator.set_input"""
+        for slot in slots:
+            self.on_change(time, slot, values[slot])
+
+    def sample(self, time, values):
+        """Сравнение записываемых сигналов с полным списком значений ячеек"""
+        for slot, signals in self.by_slot.items():
+            value = bool(values[slot])
+            if self.current[signals[0]] != value:
+                for index in signals:
+                    self.current[index] = value
+                    self.times[index].append(time)
+
+    def transitions(self, name):
+        """Список (время, значение) изменений сигнала"""
+        index = self.names.index(name)
+        value = self.initial[index]
+        result = []
+        for time in self.times[index]:
+            value = not value
+            result.append((time, value))
+        return result
+
+    def value_at(self, name, time):
+        """Значение сигнала в момент time"""
+        index = self.names.index(name)
+        # Четное число изменений не позже time оставляет начальное значение
+        count = bisect_right(self.times[index], time)
+        return self.initial[index] != bool(count & 1)
+
+    def write_vcd(self, file, timescale='1ns', time_factor=1, module='circuit'):
+        """Потоковая запись в формате VCD; file - путь или открытый текстовый файл
+
+        Время в файле - время записи, умноженное на time_factor и
+        округленное до целого. Изменения всех сигналов сливаются по
+        времени без построения общего списка.
+        """
+        if isinstance(file, str):
+            with open(file, 'w', encoding='utf-8') as output:
+                self.write_vcd(output, timescale, time_factor, module)
+            return
+
+        identifiers = [vcd_identifier(index) for index in range(len(self.names))]
+        write = file.write
+        write(f"$timescale {timescale} $end\n")
+        write(f"$scope module {module} $end\n")
+        for name, identifier in zip(self.names, identifiers):
+            write(f"$var wire 1 {identifier} {'_'.join(name.split())} $end\n")
+        write("$upscope $end\n$enddefinitions $end\n")
+        write("#0\n$dumpvars\n")
+        for value, identifier in zip(self.initial, identifiers):
+            write(f"{int(value)}{identifier}\n")
+        write("$end\n")
+
+        def changes(index):
+            value = self.initial[index]
+            identifier = identifiers[index]
+            for time in self.times[index]:
+                value = not value
+                yield round(time * time_factor), index, value, identifier
+
+        last = 0
+        for time, _, value, identifier in heapq.merge(
+                *(changes(index) for index in range(len(self.names)))):
+            if time != last:
+                write(f"#{time}\n")
+                last = time
+            write(f"{int(value)}{identifier}\n")